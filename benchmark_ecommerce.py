@@ -0,0 +1,161 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from complete_code import EcommerceApp
+
+DEFAULT_SCALES = (10 ** 4, 10 ** 5, 10 ** 6)
+OPERATIONS = ('register_user', 'add_product', 'add_to_cart', 'checkout', 'track_order')
+
+
+# Synthetic workloads
+
+def generate_users(count: int):
+    for index in range(count):
+        yield f'user{index}', 'Password123!', f'user{index}@example.com'
+
+
+def generate_products(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for index in range(count):
+        yield f'Product {index}', round(rng.uniform(0.01, 10000.0), 2), f'Synthetic product number {index}'
+
+
+def generate_cart_adds(users: int, products: int, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield f'user{rng.randrange(users)}', rng.randrange(products), rng.randint(1, 5)
+
+
+# Measurement
+
+def summarize(latencies: array, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'calls': count,
+        'ops_per_sec': count / seconds if seconds else 0.0,
+        'p50_us': ordered[count // 2] / 1000 if count else 0.0,
+        'p99_us': ordered[min(count - 1, count * 99 // 100)] / 1000 if count else 0.0,
+    }
+
+
+def timed_calls(method, calls) -> dict:
+    latencies = array('q')
+    clock = time.perf_counter_ns
+    started = clock()
+    for args in calls:
+        before = clock()
+        method(*args)
+        latencies.append(clock() - before)
+    return summarize(latencies, (clock() - started) / 1e9)
+
+
+def run_scale(scale: int, seed: int = 0) -> dict:
+    # One scale step: `scale` users, products, cart adds, orders and order lookups
+    app = EcommerceApp()
+    rng = random.Random(seed)
+    results = {
+        'register_user': timed_calls(app.register_user, list(generate_users(scale))),
+        'add_product': timed_calls(app.add_product, list(generate_products(scale, seed))),
+        'add_to_cart': timed_calls(app.add_to_cart, list(generate_cart_adds(scale, scale, scale, seed + 1))),
+    }
+    # Every user checks out once; users whose cart is still empty get one item first
+    for username, _, _ in generate_users(scale):
+        if username not in app.carts:
+            app.add_to_cart(username, rng.randrange(scale), 1)
+    results['checkout'] = timed_calls(
+        app.checkout, [(username, '123 Main St', 'credit_card') for username, _, _ in generate_users(scale)])
+    results['track_order'] = timed_calls(app.track_order, [(rng.randrange(scale),) for _ in range(scale)])
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_kb //= 1024  # macOS reports bytes
+    return {'scale': scale, 'peak_rss_kb': peak_kb, 'operations': results}
+
+
+def run_suite(scales, seed: int = 0) -> list:
+    # Each step runs in a fresh process so peak RSS belongs to that step alone
+    steps = []
+    for scale in scales:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            steps.append(executor.submit(run_scale, scale, seed).result())
+    return steps
+
+
+# Reporting
+
+def current_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    # Operations whose throughput dropped by more than `threshold` (0.10 = 10%)
+    previous = {(step['scale'], name): stats
+                for step in baseline['steps'] for name, stats in step['operations'].items()}
+    regressions = []
+    for step in current['steps']:
+        for name, stats in step['operations'].items():
+            before = previous.get((step['scale'], name))
+            if before is None or not before['ops_per_sec']:
+                continue
+            ratio = stats['ops_per_sec'] / before['ops_per_sec']
+            if ratio < 1 - threshold:
+                regressions.append({'scale': step['scale'], 'operation': name, 'ratio': ratio})
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    lines = [f"revision {report['revision']}  python {report['python']}"]
+    for step in report['steps']:
+        lines.append(f"scale {step['scale']:>9,}  peak RSS {step['peak_rss_kb'] / 1024:,.1f} MiB")
+        for name in OPERATIONS:
+            stats = step['operations'][name]
+            lines.append(f"  {name:<14} {stats['ops_per_sec']:>12,.0f} ops/s"
+                         f"  p50 {stats['p50_us']:>8.2f} us  p99 {stats['p99_us']:>8.2f} us")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scale benchmarks for complete_code.EcommerceApp")
+    parser.add_argument('--scales', default=','.join(str(scale) for scale in DEFAULT_SCALES),
+                        help="comma-separated entity counts per step")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed throughput drop (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale]
+    report = {
+        'revision': current_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'steps': run_suite(scales, args.seed),
+    }
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(json.load(file), report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION scale {regression['scale']} {regression['operation']}: "
+                  f"{regression['ratio']:.0%} of baseline throughput")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,47 @@
+import csv
+import heapq
+import io
+import json
+import math
+import numbers
+import os
 import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from contextlib import nullcontext
+from itertools import chain, islice
+
+# Compiled once and shared by every User instead of being rebuilt per call
+EMAIL_PATTERN = re.compile(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$")
+PASSWORD_SPECIAL_CHARS = frozenset('!@#$%^&*()_+-=[]{}|;:,.<>?/`~')
+ORDER_STATUSES = ('Processing', 'Shipped', 'Delivered', 'Cancelled')
+TERMINAL_STATUSES = ('Delivered', 'Cancelled')  # No transitions out of these
+# Statuses each status may move to (staying put is always allowed)
+STATUS_TRANSITIONS = {
+    'Processing': frozenset(('Processing', 'Shipped', 'Cancelled')),
+    'Shipped': frozenset(('Shipped', 'Delivered', 'Cancelled')),
+    'Delivered': frozenset(('Delivered',)),
+    'Cancelled': frozenset(('Cancelled',)),
+}
+PAYMENT_METHODS = ('credit_card', 'debit_card', 'paypal')
+PRICE_SCALE = 1_000_000  # Prices are kept as integer micro-units (6 decimal places)
+MAX_PRICE_MICROS = 10000 * PRICE_SCALE
+
+
+def price_to_micros(price) -> int:
+    # Ints convert exactly; other reals are rounded to the nearest micro-unit
+    if isinstance(price, int):
+        return price * PRICE_SCALE
+    if not isinstance(price, numbers.Real):
+        raise TypeError("Product price must be a number.")
+    price = float(price)
+    if not math.isfinite(price):
+        raise ValueError("Invalid product price")
+    return round(price * PRICE_SCALE)
+
 
 class User:
     def __init__(self, username: str, password: str, email: str):
@@ -8,26 +51,48 @@ class User:
 
         # Validate password
         if len(password) < 8 or password.isspace() or not any(char.isdigit() for char in password) \
-                or not any(char in '!@#$%^&*()_+-=[]{}|;:,.<>?/`~' for char in password):
+                or PASSWORD_SPECIAL_CHARS.isdisjoint(password):
             raise ValueError("Invalid password")
 
         # Validate email
         email = email.strip()
-        if not re.match(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$", email):
+        if not EMAIL_PATTERN.match(email):
             raise ValueError("Invalid email")  # Ensure message matches test case
         
         self.username = username
         self.password = password
         self.email = email
+        self._registry = None  # EcommerceApp that indexes this user's email, if any
+
+    def __getstate__(self):
+        # Pickle the user on its own, without the app that indexes it
+        return dict(self.__dict__, _registry=None)
+
+    @classmethod
+    def _view(cls, username: str, password: str, email: str):
+        # Build an already-validated user, e.g. from encoded data
+        user = cls.__new__(cls)
+        user.username = username
+        user.password = password
+        user.email = email
+        user._registry = None
+        return user
 
     def update_email(self, new_email: str):
         new_email = new_email.strip()
-        if not re.match(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$", new_email):
+        if not EMAIL_PATTERN.match(new_email):
             raise ValueError("Invalid email")  # Same email validation as in __init__
-            
+
+        # Keep the owning app's email index in step with the change
+        if self._registry is not None:
+            self._registry._reindex_email(self, new_email)
         self.email = new_email
+        if self._registry is not None:
+            self._registry._email_changed(self)
 
 class Product:
+    __slots__ = ('name', 'price_micros', 'description', 'product_id')
+
     def __init__(self, name: str, price: float, description: str):
         # Validate name
         if not isinstance(name, str):
@@ -37,8 +102,9 @@ class Product:
         if name.strip() == '':
             raise ValueError("Invalid product name")
 
-        # Validate price
-        if not (price > 0 and price <= 10000.00):
+        # Validate price (bounds are checked on the integer micro-unit form)
+        price_micros = price_to_micros(price)
+        if not (0 < price_micros <= MAX_PRICE_MICROS):
             raise ValueError("Invalid product price")  # Update error message to match test case
 
         # Validate description
@@ -48,34 +114,278 @@ class Product:
             raise ValueError("Description length exceeds 200 characters")  # 수정된 예외 메시지
 
         self.name = name.strip()
-        self.price = round(price, 6)  # Preserve up to 6 decimal places
+        self.price_micros = price_micros  # Preserve up to 6 decimal places
         self.description = description.strip()
+        self.product_id = None  # Catalog position once added to an EcommerceApp
+
+    @property
+    def price(self) -> float:
+        return self.price_micros / PRICE_SCALE
+
+    @classmethod
+    def _view(cls, product_id: int, name: str, price_micros: int, description: str):
+        # Build an already-validated product straight from catalog columns
+        product = cls.__new__(cls)
+        product.name = name
+        product.price_micros = price_micros
+        product.description = description
+        product.product_id = product_id
+        return product
+
+
+class _StringColumn:
+    # UTF-8 strings packed into one buffer, with the end offset of each row
+    __slots__ = ('_data', '_ends')
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array('Q')
+
+    def __len__(self):
+        return len(self._ends)
+
+    def append(self, value: str):
+        self._data += value.encode('utf-8')
+        self._ends.append(len(self._data))
+
+    def __getitem__(self, index: int) -> str:
+        start = self._ends[index - 1] if index > 0 else 0
+        return self._data[start:self._ends[index]].decode('utf-8')
+
+
+class ProductCatalog:
+    # Column-oriented product storage. Rows are handed out as fresh Product views,
+    # so changing a view does not change the catalog.
+    def __init__(self):
+        self._names = _StringColumn()
+        self._descriptions = _StringColumn()
+        self._prices = array('q')  # Micro-units
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("catalog index out of range")
+        return Product._view(index, self._names[index], self._prices[index], self._descriptions[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, product: Product) -> int:
+        product_id = len(self._prices)
+        self._names.append(product.name)
+        self._descriptions.append(product.description)
+        self._prices.append(product.price_micros)
+        product.product_id = product_id
+        return product_id
+
+    def price_micros_column(self) -> memoryview:
+        # Read-only view of every price, for vectorized aggregation (e.g. numpy.frombuffer)
+        return memoryview(self._prices).toreadonly()
+
+
+class ProductSearchIndex:
+    # Token -> ascending product IDs, over product names and descriptions. A sorted
+    # vocabulary lets prefix terms expand by bisection instead of scanning every token;
+    # new tokens are collected unsorted and merged in by the next prefix search.
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._new_tokens = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def tokenize(cls, text: str) -> list:
+        return cls.TOKEN_PATTERN.findall(text.casefold())
+
+    def add(self, product_id: int, product: Product):
+        for token in set(self.tokenize(product.name) + self.tokenize(product.description)):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = array('q')
+                with self._lock:
+                    self._new_tokens.append(token)
+            posting.append(product_id)  # IDs arrive in ascending order
+
+    def _expand(self, term: str, prefix: bool) -> list:
+        if not prefix:
+            posting = self._postings.get(term)
+            return [posting] if posting is not None else []
+        vocabulary = self._sorted_vocabulary()
+        postings = []
+        index = bisect_left(vocabulary, term)
+        while index < len(vocabulary) and vocabulary[index].startswith(term):
+            postings.append(self._postings[vocabulary[index]])
+            index += 1
+        return postings
+
+    def _sorted_vocabulary(self) -> list:
+        with self._lock:
+            if self._new_tokens:
+                # Two sorted runs; Timsort merges them in linear time
+                self._new_tokens.sort()
+                self._vocabulary = sorted(self._vocabulary + self._new_tokens)
+                self._new_tokens = []
+            return self._vocabulary
+
+    def search(self, query: str, mode: str = 'and', prefix: bool = False) -> list:
+        if mode not in ('and', 'or'):
+            raise ValueError("Invalid search mode")
+        terms = self.tokenize(query)
+        if not terms:
+            return []
+        matches = [self._expand(term, prefix) for term in dict.fromkeys(terms)]
+        if mode == 'or':
+            return sorted(set().union(*(posting for postings in matches for posting in postings)))
+        if not all(matches):
+            return []
+        # Start from the rarest term and probe the others by bisection
+        matches.sort(key=lambda postings: sum(len(posting) for posting in postings))
+        candidates = set().union(*matches[0])
+        for postings in matches[1:]:
+            candidates = {product_id for product_id in candidates
+                          if any(_sorted_contains(posting, product_id) for posting in postings)}
+            if not candidates:
+                break
+        return sorted(candidates)
+
+
+def _sorted_contains(values, value) -> bool:
+    index = bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+class PriceIndex:
+    # Product IDs ordered by price (ties by ID) in two parallel arrays. New products go
+    # to an unsorted tail that the next query sorts and merges in, so adds stay cheap.
+    def __init__(self):
+        self._prices = array('q')
+        self._product_ids = array('q')
+        self._pending = []  # (price_micros, product_id) added since the last merge
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._prices) + len(self._pending)
+
+    def add(self, product_id: int, price_micros: int):
+        with self._lock:
+            self._pending.append((price_micros, product_id))
+
+    def _sorted(self) -> tuple:
+        # The merged (prices, product_ids) arrays; later merges build new arrays, so
+        # callers can keep reading the pair they got
+        with self._lock:
+            if self._pending:
+                self._pending.sort()
+                pairs = sorted(chain(zip(self._prices, self._product_ids), self._pending))
+                self._prices = array('q', [price for price, _ in pairs])
+                self._product_ids = array('q', [product_id for _, product_id in pairs])
+                self._pending = []
+            return self._prices, self._product_ids
+
+    def bounds(self, min_price=None, max_price=None) -> tuple:
+        # [start, end) positions of the prices inside the inclusive range
+        return self._bounds(self._sorted()[0], min_price, max_price)
+
+    @staticmethod
+    def _bounds(prices: array, min_price, max_price) -> tuple:
+        start = 0 if min_price is None else bisect_left(prices, price_to_micros(min_price))
+        end = len(prices) if max_price is None else bisect_right(prices, price_to_micros(max_price))
+        return start, max(start, end)
+
+    def iter_range(self, min_price=None, max_price=None, descending: bool = False):
+        prices, product_ids = self._sorted()
+        start, end = self._bounds(prices, min_price, max_price)
+        positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+        for position in positions:
+            yield product_ids[position]
+
+    def page(self, min_price=None, max_price=None, descending: bool = False, offset: int = 0, limit: int = 20) -> list:
+        if offset < 0 or limit < 1:
+            raise ValueError("Invalid page")
+        prices, product_ids = self._sorted()
+        start, end = self._bounds(prices, min_price, max_price)
+        if descending:
+            stop = end - offset
+            return product_ids[max(start, stop - limit):max(start, stop)][::-1].tolist()
+        first = start + offset
+        return product_ids[min(first, end):min(first + limit, end)].tolist()
+
+
+class LineItem(namedtuple('LineItem', ['product_id', 'unit_price_micros', 'quantity'])):
+    # Immutable order line captured at checkout: no reference to the live Product
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        # Dict-style access keeps code written against cart item dicts working
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    @property
+    def total_micros(self) -> int:
+        return self.unit_price_micros * self.quantity
 
 
 class ShoppingCart:
     def __init__(self):
-        self.cart = []
+        # Line items in insertion order, keyed by product ID (or identity outside a catalog)
+        self._lines = {}
+        self.subtotal_micros = 0  # Running sum of price * quantity over all lines
+
+    @property
+    def cart(self):
+        return list(self._lines.values())
 
-    def add_to_cart(self, product: Product, quantity: int):
+    def add_to_cart(self, product: Product, quantity: int, key=None):
         if not isinstance(quantity, int):
             raise TypeError("Quantity must be an integer")
         if quantity < 1 or quantity > 100:
             raise ValueError("Invalid quantity")
 
-        for item in self.cart:
-            if item['product'] == product:
-                item['quantity'] += quantity
-                return
-        self.cart.append({'product': product, 'quantity': quantity})
+        if key is None:
+            # Catalog lookups return a fresh view each time, so merge those by ID;
+            # products outside a catalog are merged by identity
+            key = product.product_id if product.product_id is not None else product
+        self.subtotal_micros += product.price_micros * quantity
+        item = self._lines.get(key)
+        if item is not None:
+            item['quantity'] += quantity
+            return
+        self._lines[key] = {'product': product, 'quantity': quantity}
+
+    @property
+    def subtotal(self) -> float:
+        return self.subtotal_micros / PRICE_SCALE
 
     def view_cart(self):
-        return self.cart.copy()
+        return list(self._lines.values())
 
+    def is_empty(self) -> bool:
+        return not self._lines
 
-class Order:
-    def __init__(self, user: User, items: list, address: str, payment_method: str):
-        valid_payment_methods = ['credit_card', 'debit_card', 'paypal']
+    def _restore_line(self, product: Product, quantity: int, key):
+        # Re-create a line exactly as it was (merged quantities may exceed 100)
+        self._lines[key] = {'product': product, 'quantity': quantity}
+        self.subtotal_micros += product.price_micros * quantity
+
+    def line_items(self) -> tuple:
+        return tuple(LineItem(item['product'].product_id, item['product'].price_micros, item['quantity'])
+                     for item in self._lines.values())
 
+
+class Order:
+    def __init__(self, user: User, items: list, address: str, payment_method: str, total_micros: int = None):
         if user is None:
             raise ValueError("Invalid user")  # 수정된 메시지
         if not items or any(item is None or item['quantity'] <= 0 for item in items):
@@ -83,7 +393,7 @@ class Order:
         address = address.strip()
         if not (1 <= len(address) <= 100) or any(ord(char) < 32 for char in address) or address.strip() == '':
             raise ValueError("Invalid address length or contains non-printable characters.")
-        if payment_method not in valid_payment_methods:
+        if payment_method not in PAYMENT_METHODS:
             raise ValueError("Invalid payment method.")
 
         self.user = user
@@ -91,47 +401,646 @@ class Order:
         self.address = address
         self.payment_method = payment_method
         self.status = 'Processing'
+        # Frozen at creation
+        if total_micros is None:
+            total_micros = sum(item.total_micros if isinstance(item, LineItem)
+                               else item['product'].price_micros * item['quantity'] for item in items)
+        self.total_micros = total_micros
+        self.order_id = None  # Assigned by EcommerceApp.checkout
+        self._registry = None  # EcommerceApp that indexes this order's status, if any
+
+    @property
+    def total(self) -> float:
+        return self.total_micros / PRICE_SCALE
+
+    def __getstate__(self):
+        # Pickle the order on its own, without the app that indexes it
+        return dict(self.__dict__, _registry=None)
+
+    @classmethod
+    def _view(cls, order_id, user: User, items: tuple, address: str, payment_method: str, status: str,
+              total_micros: int):
+        # Build an already-validated order, e.g. from encoded data
+        order = cls.__new__(cls)
+        order.user = user
+        order.items = items
+        order.address = address
+        order.payment_method = payment_method
+        order.status = status
+        order.total_micros = total_micros
+        order.order_id = order_id
+        order._registry = None
+        return order
 
     def update_status(self, new_status: str):
-        valid_statuses = ['Processing', 'Shipped', 'Delivered', 'Cancelled']
-        status_flow = {
-            'Processing': ['Processing', 'Shipped', 'Cancelled'],
-            'Shipped': ['Shipped', 'Delivered', 'Cancelled'],
-            'Delivered': ['Delivered'],
-            'Cancelled': ['Cancelled']
-        }
-
-        if new_status not in valid_statuses:
+        if new_status not in STATUS_TRANSITIONS:
             raise ValueError("Invalid status")
-        if new_status == self.status:
-            return  # No change is needed if it's the same status
-        if new_status not in status_flow[self.status]:
-            raise ValueError(f"Cannot change status from {self.status} to {new_status}")
-        self.status = new_status
+        registry = self._registry
+        # Check and change under the owning app's order lock, like update_statuses
+        with registry._order_lock if registry is not None else nullcontext():
+            if new_status == self.status:
+                return  # No change is needed if it's the same status
+            if new_status not in STATUS_TRANSITIONS[self.status]:
+                raise ValueError(f"Cannot change status from {self.status} to {new_status}")
+            old_status = self.status
+            self.status = new_status
+            if registry is not None:
+                registry._reindex_status(self, old_status)
+        if registry is not None:
+            registry._order_status_changed(self, old_status)
+
+
+class OrderArchive:
+    # Append-only on-disk store for orders that can no longer change. Each archive run
+    # writes one segment file of JSON lines; memory holds only a compact per-segment index
+    # (sorted order IDs, byte offsets and status codes).
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        if any(name.startswith('segment-') for name in os.listdir(directory)):
+            raise ValueError("Archive directory is not empty")
+        self._directory = directory
+        self._segments = []  # (path, order_ids, offsets, status_codes)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def write_segment(self, orders: list):
+        orders = sorted(orders, key=lambda order: order.order_id)
+        path = os.path.join(self._directory, f'segment-{len(self._segments):06d}.jsonl')
+        order_ids, offsets, status_codes = array('q'), array('q'), array('b')
+        with open(path, 'wb') as file:
+            for order in orders:
+                order_ids.append(order.order_id)
+                offsets.append(file.tell())
+                status_codes.append(ORDER_STATUSES.index(order.status))
+                record = [order.order_id, order.user.username, order.address, order.payment_method,
+                          order.status, order.total_micros, [list(item) for item in order.items]]
+                file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self._segments.append((path, order_ids, offsets, status_codes))
+        self._count += len(orders)
+
+    def __contains__(self, order_id: int) -> bool:
+        return self._locate(order_id) is not None
+
+    def _locate(self, order_id: int):
+        for path, order_ids, offsets, _ in self._segments:
+            index = bisect_left(order_ids, order_id)
+            if index < len(order_ids) and order_ids[index] == order_id:
+                return path, offsets[index]
+        return None
+
+    def load(self, order_id: int, users: dict):
+        location = self._locate(order_id)
+        if location is None:
+            return None
+        path, offset = location
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            return self._order_from_record(json.loads(file.readline()), users)
+
+    @staticmethod
+    def _order_from_record(record: list, users: dict) -> Order:
+        # Archived records were validated when the orders were placed
+        order_id, username, address, payment_method, status, total_micros, items = record
+        return Order._view(order_id, users[username], tuple(LineItem(*item) for item in items), address,
+                           payment_method, status, total_micros)
+
+    def iter_orders(self, users: dict, status: str = None):
+        # Every archived order (optionally of one status) in ID order, reading each
+        # segment front to back; only one record per segment is in memory at a time
+        code = None if status is None else ORDER_STATUSES.index(status)
+        return heapq.merge(*(self._iter_segment(segment, users, code) for segment in self._segments),
+                           key=lambda order: order.order_id)
+
+    def _iter_segment(self, segment: tuple, users: dict, code):
+        path, _, _, status_codes = segment
+        with open(path, 'rb') as file:
+            for line, order_code in zip(file, status_codes):
+                if code is None or order_code == code:
+                    yield self._order_from_record(json.loads(line), users)
+
+    def order_ids_with_status(self, status: str) -> set:
+        code = ORDER_STATUSES.index(status)
+        return {order_id for _, order_ids, _, status_codes in self._segments
+                for order_id, order_code in zip(order_ids, status_codes) if order_code == code}
+
+    def count_by_status(self) -> dict:
+        counts = dict.fromkeys(ORDER_STATUSES, 0)
+        for _, _, _, status_codes in self._segments:
+            for code in status_codes:
+                counts[ORDER_STATUSES[code]] += 1
+        return counts
+
+
+class OrderBook:
+    # Orders by ID. Orders stay in memory while they can still change; once archived,
+    # they are read back from the OrderArchive on access.
+    def __init__(self, users: dict):
+        self._users = users
+        self._hot = {}
+        self._next_id = 0
+        self.archive = None
+
+    def __len__(self):
+        return self._next_id  # Every order ever placed, archived or not
+
+    @property
+    def in_memory_count(self) -> int:
+        return len(self._hot)
+
+    def append(self, order: Order) -> int:
+        order_id = self._next_id
+        self._hot[order_id] = order
+        self._next_id += 1
+        return order_id
+
+    def __getitem__(self, order_id: int) -> Order:
+        if order_id < 0:
+            order_id += self._next_id  # Negative indices count from the newest order, as on a list
+        order = self._hot.get(order_id)
+        if order is None and self.archive is not None:
+            order = self.archive.load(order_id, self._users)
+        if order is None:
+            raise IndexError("order ID out of range")
+        return order
+
+    def __iter__(self):
+        return self.iter_orders()
+
+    def iter_orders(self, status: str = None):
+        # Orders in ID order; archived ones are streamed segment by segment instead of
+        # being looked up one at a time
+        hot = (order for order in map(self._hot.get, range(self._next_id))
+               if order is not None and (status is None or order.status == status))
+        if self.archive is None:
+            return hot
+        return heapq.merge(hot, self.archive.iter_orders(self._users, status), key=lambda order: order.order_id)
+
+    def archive_terminal(self) -> list:
+        terminal = [order for order in self._hot.values() if order.status in TERMINAL_STATUSES]
+        if terminal:
+            self.archive.write_segment(terminal)
+            for order in terminal:
+                del self._hot[order.order_id]
+                order._registry = None
+        return terminal
+
+
+StatusEvent = namedtuple('StatusEvent', ['sequence', 'order_id', 'old_status', 'new_status'])
+
+
+class StatusEventLog:
+    # Bounded ring buffer of order status transitions. Every event gets the next
+    # sequence number; once `capacity` newer events exist, the oldest is overwritten.
+    # Readers keep their own position and resume from it with read().
+    def __init__(self, capacity: int = 65536):
+        if capacity < 1:
+            raise ValueError("Invalid capacity")
+        self.capacity = capacity
+        self._events = []
+        self._next_sequence = 0
+        self._lock = threading.Lock()
+
+    @property
+    def next_sequence(self) -> int:
+        return self._next_sequence
+
+    @property
+    def oldest_sequence(self) -> int:
+        return max(0, self._next_sequence - self.capacity)
+
+    def publish(self, order_id: int, old_status, new_status: str) -> int:
+        with self._lock:
+            sequence = self._next_sequence
+            event = StatusEvent(sequence, order_id, old_status, new_status)
+            if len(self._events) < self.capacity:
+                self._events.append(event)
+            else:
+                self._events[sequence % self.capacity] = event
+            self._next_sequence = sequence + 1
+        return sequence
+
+    def read(self, from_sequence: int, limit: int = 1000):
+        # Events with sequence >= from_sequence, and the position to resume from
+        if limit < 1:
+            raise ValueError("Invalid limit")
+        with self._lock:
+            if from_sequence < self.oldest_sequence:
+                raise ValueError("Sequence no longer available")
+            end = min(self._next_sequence, from_sequence + limit)
+            events = [self._events[sequence % self.capacity] for sequence in range(from_sequence, end)]
+        return events, max(from_sequence, end)
+
+    def subscribe(self, from_sequence: int = None):
+        return StatusSubscription(self, self._next_sequence if from_sequence is None else from_sequence)
+
+
+class StatusSubscription:
+    # A reader's position in a StatusEventLog
+    def __init__(self, log: StatusEventLog, position: int):
+        self.log = log
+        self.position = position
+
+    def poll(self, limit: int = 1000) -> list:
+        events, self.position = self.log.read(self.position, limit)
+        return events
+
+
+def iter_product_rows(file, file_format: str = 'csv'):
+    # Lazily parse a product feed into (name, price, description) tuples.
+    # Rows that cannot be parsed are yielded as None so they can be counted as rejected.
+    if file_format == 'csv':
+        for row in csv.DictReader(file):
+            yield (row.get('name'), row.get('price'), row.get('description') or '')
+    elif file_format == 'jsonl':
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            if not isinstance(row, dict):
+                yield None
+                continue
+            yield (row.get('name'), row.get('price'), row.get('description', ''))
+    else:
+        raise ValueError("Unsupported file format")
+
+
+ORDER_EXPORT_COLUMNS = ('order_id', 'username', 'address', 'payment_method', 'status', 'total_micros',
+                        'product_id', 'unit_price_micros', 'quantity')
+
+
+def iter_order_rows(orders, file_format: str = 'jsonl'):
+    # Lazily render orders for export, yielding the text for one order at a time.
+    # JSONL has one object per order; CSV has a header and then one row per line item.
+    if file_format == 'jsonl':
+        for order in orders:
+            yield json.dumps({
+                'order_id': order.order_id, 'username': order.user.username, 'address': order.address,
+                'payment_method': order.payment_method, 'status': order.status,
+                'total_micros': order.total_micros, 'items': [list(item) for item in order.items],
+            }, separators=(',', ':')) + '\n'
+    elif file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(ORDER_EXPORT_COLUMNS)
+        yield buffer.getvalue()
+        for order in orders:
+            buffer.seek(0)
+            buffer.truncate()
+            head = (order.order_id, order.user.username, order.address, order.payment_method, order.status,
+                    order.total_micros)
+            writer.writerows(head + tuple(item) for item in order.items)
+            yield buffer.getvalue()
+    else:
+        raise ValueError("Unsupported file format")
+
+
+def iter_chunks(iterable, chunk_size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LockStripes:
+    # A fixed pool of locks shared by keys hashing to the same stripe, so per-user
+    # locking needs no lock object per user
+    def __init__(self, count: int = 64):
+        if count < 1:
+            raise ValueError("Invalid stripe count")
+        self._locks = [threading.Lock() for _ in range(count)]
+
+    def for_key(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class _NullLock:
+    # Stand-in for threading.Lock when thread safety is off
+    def acquire(self, blocking: bool = True) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class _NoStripes:
+    _lock = _NullLock()
+
+    def for_key(self, key):
+        return self._lock
+
+
+class CartStore:
+    # Carts by username, created on first use. Carts that are idle for `idle_seconds`,
+    # or the least recently used ones beyond `max_live`, can be spilled to compact
+    # (product ID, quantity) arrays and are rebuilt transparently on the next access.
+    def __init__(self, products: ProductCatalog, max_live: int = None, idle_seconds: float = None, lock=None):
+        if (max_live is not None and max_live < 1) or (idle_seconds is not None and idle_seconds < 0):
+            raise ValueError("Invalid eviction policy")
+        self._products = products
+        self.max_live = max_live
+        self.idle_seconds = idle_seconds
+        self._lock = lock if lock is not None else nullcontext()
+        self._live = OrderedDict()  # username -> [cart, last used], least recently used first
+        self._spilled = {}  # username -> packed array('q') of product ID, quantity pairs
+
+    def __len__(self):
+        return len(self._live) + len(self._spilled)
+
+    def __contains__(self, username) -> bool:
+        return username in self._live or username in self._spilled
+
+    def __iter__(self):
+        yield from list(self._live)
+        yield from list(self._spilled)
+
+    @property
+    def live_count(self) -> int:
+        return len(self._live)
+
+    @property
+    def spilled_count(self) -> int:
+        return len(self._spilled)
+
+    def __getitem__(self, username: str) -> ShoppingCart:
+        with self._lock:
+            entry = self._live.get(username)
+            if entry is None:
+                packed = self._spilled.pop(username)  # KeyError if the user has no cart
+                entry = self._live[username] = [self._unpack(packed), 0.0]
+            self._live.move_to_end(username)
+            entry[1] = time.monotonic()
+            return entry[0]
+
+    def get_or_create(self, username: str) -> ShoppingCart:
+        with self._lock:
+            if username not in self._live and username not in self._spilled:
+                self._live[username] = [ShoppingCart(), time.monotonic()]
+        return self[username]
+
+    def items(self):
+        # Every cart, spilled ones decoded without loading them back into memory
+        for username in list(self._live):
+            entry = self._live.get(username)
+            if entry is not None:
+                yield username, entry[0]
+        for username, packed in list(self._spilled.items()):
+            yield username, self._unpack(packed)
+
+    def discard(self, username: str):
+        with self._lock:
+            self._live.pop(username, None)
+            self._spilled.pop(username, None)
+
+    def needs_eviction(self) -> bool:
+        if self.max_live is not None and len(self._live) > self.max_live:
+            return True
+        if self.idle_seconds is not None and self._live:
+            oldest = next(iter(self._live.values()))
+            return time.monotonic() - oldest[1] > self.idle_seconds
+        return False
+
+    def eviction_candidates(self) -> list:
+        with self._lock:
+            now = time.monotonic()
+            excess = len(self._live) - self.max_live if self.max_live is not None else 0
+            candidates = []
+            for username, (_, last_used) in self._live.items():
+                if len(candidates) < excess or (self.idle_seconds is not None and now - last_used > self.idle_seconds):
+                    candidates.append(username)
+                else:
+                    break  # Entries are in least recently used order
+            return candidates
+
+    def spill(self, username: str) -> bool:
+        with self._lock:
+            entry = self._live.pop(username, None)
+            if entry is None:
+                return False
+            cart = entry[0]
+            if not cart.is_empty():
+                packed = array('q')
+                for item in cart.view_cart():
+                    packed.append(item['product'].product_id)
+                    packed.append(item['quantity'])
+                self._spilled[username] = packed
+            return True
+
+    def _unpack(self, packed: array) -> ShoppingCart:
+        cart = ShoppingCart()
+        for index in range(0, len(packed), 2):
+            product_id = packed[index]
+            cart._restore_line(self._products[product_id], packed[index + 1], product_id)
+        return cart
 
 
 class EcommerceApp:
-    def __init__(self):
+    def __init__(self, thread_safe: bool = False, lock_stripes: int = 64, event_capacity: int = 65536,
+                 max_live_carts: int = None, cart_idle_seconds: float = None):
+        # thread_safe=True guards carts with striped per-user locks and keeps the
+        # shared registries (users, catalog, orders) behind short critical sections
+        if thread_safe:
+            self._user_locks = LockStripes(lock_stripes)
+            self._registry_lock = threading.Lock()
+            self._catalog_lock = threading.Lock()
+            self._order_lock = threading.Lock()
+        else:
+            self._user_locks = _NoStripes()
+            self._registry_lock = self._catalog_lock = self._order_lock = nullcontext()
         self.users = {}
-        self.products = []
-        self.carts = {}
-        self.orders = []
+        self.products = ProductCatalog()
+        self.carts = CartStore(self.products, max_live_carts, cart_idle_seconds,
+                               threading.Lock() if thread_safe else None)
+        self.orders = OrderBook(self.users)
+        self._orders_by_status = {status: set() for status in ORDER_STATUSES}
+        self._orders_by_user = {}  # username -> ascending array of order IDs
+        # Case-insensitive uniqueness indexes: casefolded key -> username
+        self._usernames = {}
+        self._emails = {}
+        self._search_index = ProductSearchIndex()
+        self._price_index = PriceIndex()
+        self.status_events = StatusEventLog(event_capacity)  # Change-data-capture of order statuses
 
     def register_user(self, username: str, password: str, email: str) -> bool:
-        
-        if any(user.username.lower() == username.lower() for user in self.users.values()) or \
-        any(user.email.lower() == email.lower() for user in self.users.values()):
+        if username.casefold() in self._usernames or email.strip().casefold() in self._emails:
             raise ValueError("Username or email already exists")  # Updated error message
         new_user = User(username, password, email)
-        self.users[username] = new_user
-        self.carts[username] = ShoppingCart()
+        with self._registry_lock:
+            # Re-check: another thread may have claimed the name while we validated
+            if username.casefold() in self._usernames or new_user.email.casefold() in self._emails:
+                raise ValueError("Username or email already exists")
+            self._add_user(new_user)
         return True
 
+    def register_users(self, rows) -> list:
+        # Bulk registration. Each row is (username, password, email) or a dict with those
+        # keys. Returns one report per row instead of stopping at the first bad row.
+        reports = []
+        accepted = []  # (report, user) pairs that passed validation
+        for row_number, row in enumerate(rows):
+            report = {'row': row_number, 'username': None, 'registered': False, 'error': None}
+            reports.append(report)
+            try:
+                if isinstance(row, dict):
+                    username, password, email = row.get('username'), row.get('password'), row.get('email')
+                else:
+                    username, password, email = row
+            except (TypeError, ValueError):
+                report['error'] = "Invalid user data"  # Not a (username, password, email) row
+                continue
+            report['username'] = username
+            try:
+                user = User(username, password, email)
+            except (TypeError, ValueError, AttributeError) as error:
+                report['error'] = str(error) if isinstance(error, ValueError) else "Invalid user data"
+                continue
+            accepted.append((report, user))
+
+        # Validation ran outside the lock; duplicates are checked against the indexes,
+        # which also hold the rows of this batch registered so far
+        with self._registry_lock:
+            for report, user in accepted:
+                if user.username.casefold() in self._usernames or user.email.casefold() in self._emails:
+                    report['error'] = "Username or email already exists"
+                    continue
+                self._add_user(user)
+                report['registered'] = True
+        return reports
+
+    def _add_user(self, user: User):
+        self.users[user.username] = user
+        self._usernames[user.username.casefold()] = user.username
+        self._emails[user.email.casefold()] = user.username
+        user._registry = self
+
+    def _reindex_email(self, user: User, new_email: str):
+        with self._registry_lock:
+            self._move_email(user, new_email)
+
+    def _email_changed(self, user: User):
+        # Runs once user.email holds the new address; subclasses can hook in here
+        pass
+
+    def _move_email(self, user: User, new_email: str):
+        new_key = new_email.casefold()
+        owner = self._emails.get(new_key)
+        if owner is not None and owner != user.username:
+            raise ValueError("Email already exists")
+        old_key = user.email.casefold()
+        if self._emails.get(old_key) == user.username:
+            del self._emails[old_key]
+        self._emails[new_key] = user.username
+
     def add_product(self, name: str, price: float, description: str) -> bool:
-        new_product = Product(name, price, description)
-        self.products.append(new_product)
+        self._add_product(Product(name, price, description))
         return True
 
+    def _add_product(self, product: Product) -> int:
+        with self._catalog_lock:
+            product_id = self.products.append(product)
+            self._search_index.add(product_id, product)
+            self._price_index.add(product_id, product.price_micros)
+        return product_id
+
+    def products_by_price(self, min_price: float = None, max_price: float = None, descending: bool = False,
+                          offset: int = 0, limit: int = 20) -> list:
+        # One page of product IDs priced within [min_price, max_price], cheapest first
+        # unless descending; only the requested page is copied out of the index
+        return self._price_index.page(min_price, max_price, descending, offset, limit)
+
+    def iter_products_by_price(self, min_price: float = None, max_price: float = None, descending: bool = False):
+        return self._price_index.iter_range(min_price, max_price, descending)
+
+    def search_products(self, query: str, mode: str = 'and', prefix: bool = False) -> list:
+        # Product IDs whose name or description contains all ('and') or any ('or') of the
+        # query words; with prefix=True each word also matches longer words it starts
+        return self._search_index.search(query, mode, prefix)
+
+    def import_products(self, file, file_format: str = 'csv', chunk_size: int = 10000, progress=None) -> dict:
+        # Stream a CSV (name,price,description header) or JSONL feed into the catalog.
+        # Only one chunk of parsed rows is held at a time; progress(stats) runs after each chunk.
+        if chunk_size < 1:
+            raise ValueError("Invalid chunk size")
+        stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'errors': {}, 'seconds': 0.0, 'rows_per_second': 0.0}
+        errors = stats['errors']  # error message -> count
+        started = time.perf_counter()
+        for chunk in iter_chunks(iter_product_rows(file, file_format), chunk_size):
+            for row in chunk:
+                try:
+                    if row is None:
+                        raise ValueError("Malformed row")
+                    name, price, description = row
+                    if isinstance(price, str):
+                        try:
+                            price = float(price)
+                        except ValueError:
+                            raise ValueError("Invalid product price")
+                    elif isinstance(price, bool) or not isinstance(price, (int, float)):
+                        raise ValueError("Invalid product price")
+                    self._add_product(Product(name, price, description))
+                    stats['imported'] += 1
+                except (TypeError, ValueError) as error:
+                    message = str(error)
+                    errors[message] = errors.get(message, 0) + 1
+                    stats['rejected'] += 1
+            stats['rows'] += len(chunk)
+            stats['seconds'] = time.perf_counter() - started
+            stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+            if progress is not None:
+                progress(dict(stats, errors=dict(errors)))
+        return stats
+
+    def iter_orders(self, status: str = None, payment_method: str = None):
+        # Orders in ID order, archived ones included, optionally filtered
+        if status is not None and status not in ORDER_STATUSES:
+            raise ValueError("Invalid status")
+        if payment_method is not None and payment_method not in PAYMENT_METHODS:
+            raise ValueError("Invalid payment method.")
+        orders = self.orders.iter_orders(status)
+        if payment_method is None:
+            return orders
+        return (order for order in orders if order.payment_method == payment_method)
+
+    def export_orders(self, file, file_format: str = 'jsonl', status: str = None, payment_method: str = None,
+                      chunk_size: int = 10000, progress=None) -> dict:
+        # Stream matching orders to a text file as JSONL or CSV. Only one chunk of rendered
+        # orders is held at a time; progress(stats) runs after each chunk is written.
+        if chunk_size < 1:
+            raise ValueError("Invalid chunk size")
+        if file_format not in ('csv', 'jsonl'):
+            raise ValueError("Unsupported file format")
+        orders = self.iter_orders(status, payment_method)
+        stats = {'orders': 0, 'seconds': 0.0, 'orders_per_second': 0.0}
+        started = time.perf_counter()
+
+        def counted(orders):
+            for order in orders:
+                stats['orders'] += 1
+                yield order
+
+        for chunk in iter_chunks(iter_order_rows(counted(orders), file_format), chunk_size):
+            file.write(''.join(chunk))
+            stats['seconds'] = time.perf_counter() - started
+            stats['orders_per_second'] = stats['orders'] / stats['seconds'] if stats['seconds'] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+        return stats
+
     def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
         if username not in self.users:
             raise ValueError("User not registered")
@@ -139,19 +1048,145 @@ class EcommerceApp:
             raise ValueError("Invalid product ID")
 
         product = self.products[product_id]
-        self.carts[username].add_to_cart(product, quantity)
+        with self._user_locks.for_key(username):
+            self.carts.get_or_create(username).add_to_cart(product, quantity, key=product_id)
+        if self.carts.needs_eviction():
+            self.evict_idle_carts()
         return True
 
+    def evict_idle_carts(self) -> int:
+        # Spill carts the eviction policy selects. Carts whose user lock is busy are in
+        # use right now and are skipped.
+        evicted = 0
+        for username in self.carts.eviction_candidates():
+            lock = self._user_locks.for_key(username)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                evicted += self.carts.spill(username)
+            finally:
+                lock.release()
+        return evicted
+
     def checkout(self, username: str, address: str, payment_method: str) -> int:
-        if username not in self.users or username not in self.carts or not self.carts[username].cart:
-            raise ValueError("Cart is empty")
+        with self._user_locks.for_key(username):
+            if username not in self.users or username not in self.carts or self.carts[username].is_empty():
+                raise ValueError("Cart is empty")
 
-        new_order = Order(self.users[username], self.carts[username].view_cart(), address, payment_method)
-        self.orders.append(new_order)
-        self.carts[username] = ShoppingCart()  # Empty the cart after checkout
-        return len(self.orders) - 1
+            cart = self.carts[username]
+            # The total comes from the same line items the order stores, so lines edited
+            # through view_cart() cannot make the two disagree
+            new_order = Order(self.users[username], cart.line_items(), address, payment_method)
+            order_id = self._add_order(new_order)
+            self.carts.discard(username)  # The next add_to_cart creates a new cart
+        return order_id
+
+    def _add_order(self, order: Order) -> int:
+        # Only the ID allocation and index updates run under the shared order lock
+        with self._order_lock:
+            order_id = self.orders.append(order)
+            order.order_id = order_id
+            order._registry = self
+            self._orders_by_status[order.status].add(order_id)
+            self._orders_by_user.setdefault(order.user.username, array('q')).append(order_id)
+            self.status_events.publish(order_id, None, order.status)
+        return order_id
 
     def track_order(self, order_id: int):
         if order_id < 0 or order_id >= len(self.orders):
             raise ValueError("Invalid order ID")
         return self.orders[order_id]
+
+    def orders_for_user(self, username: str, cursor: int = None, limit: int = 20):
+        # Newest first. Pass the returned cursor back in to get the next page;
+        # it is None once there are no older orders.
+        if username not in self.users:
+            raise ValueError("User not registered")
+        if limit < 1:
+            raise ValueError("Invalid limit")
+        order_ids = self._orders_by_user.get(username, ())
+        end = len(order_ids) if cursor is None else bisect_left(order_ids, cursor)
+        start = max(0, end - limit)
+        page = [self.track_order(order_ids[i]) for i in range(end - 1, start - 1, -1)]
+        next_cursor = order_ids[start] if start > 0 else None
+        return page, next_cursor
+
+    def attach_archive(self, directory: str):
+        # Enable archive_orders(); the directory must not already hold archive segments
+        self.orders.archive = OrderArchive(directory)
+
+    def archive_orders(self) -> int:
+        # Move every Delivered or Cancelled order from memory to a new archive segment.
+        # track_order keeps working for the moved IDs.
+        if self.orders.archive is None:
+            raise ValueError("No archive attached")
+        with self._order_lock:
+            archived = self.orders.archive_terminal()
+            for order in archived:
+                self._orders_by_status[order.status].discard(order.order_id)
+        return len(archived)
+
+    def update_statuses(self, order_ids, new_status: str) -> list:
+        # Move a batch of orders to new_status. Every transition is checked first, then
+        # all legal ones are applied together under the order lock. Returns one report
+        # per order ID; illegal transitions are reported there and do not stop the batch.
+        if new_status not in STATUS_TRANSITIONS:
+            raise ValueError("Invalid status")
+        reports = []
+        with self._order_lock:
+            changes = []
+            pending = set()
+            for order_id in order_ids:
+                report = {'order_id': order_id, 'updated': False, 'error': None}
+                reports.append(report)
+                if not isinstance(order_id, int) or order_id < 0 or order_id >= len(self.orders):
+                    report['error'] = "Invalid order ID"
+                    continue
+                if order_id in pending:
+                    continue  # Repeated ID: already moving to new_status
+                order = self.orders[order_id]
+                if order.status == new_status:
+                    continue
+                if new_status not in STATUS_TRANSITIONS[order.status]:
+                    report['error'] = f"Cannot change status from {order.status} to {new_status}"
+                    continue
+                pending.add(order_id)
+                changes.append((order, report))
+            for order, report in changes:
+                old_status = order.status
+                order.status = new_status
+                self._reindex_status(order, old_status)
+                report['updated'] = True
+        return reports
+
+    def _order_status_changed(self, order: Order, old_status: str):
+        # Runs after a single status change is applied; subclasses can hook in here
+        pass
+
+    def _reindex_status(self, order: Order, old_status: str):
+        # Caller holds the order lock
+        self._orders_by_status[old_status].discard(order.order_id)
+        self._orders_by_status[order.status].add(order.order_id)
+        self.status_events.publish(order.order_id, old_status, order.status)
+
+    def order_ids_by_status(self, status: str) -> list:
+        if status not in self._orders_by_status:
+            raise ValueError("Invalid status")
+        if status in TERMINAL_STATUSES and self.orders.archive is not None:
+            return sorted(self._orders_by_status[status] | self.orders.archive.order_ids_with_status(status))
+        return sorted(self._orders_by_status[status])
+
+    def revenue_micros(self, status: str = None) -> int:
+        # Exact integer sum of order totals, optionally for one status only
+        if status is None:
+            return sum(order.total_micros for order in self.orders)
+        if status not in self._orders_by_status:
+            raise ValueError("Invalid status")
+        return sum(self.orders[order_id].total_micros for order_id in self.order_ids_by_status(status))
+
+    def count_orders_by_status(self) -> dict:
+        counts = {status: len(order_ids) for status, order_ids in self._orders_by_status.items()}
+        if self.orders.archive is not None:
+            for status, count in self.orders.archive.count_by_status().items():
+                counts[status] += count
+        return counts
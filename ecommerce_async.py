@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from complete_code import EcommerceApp
+
+
+class AsyncEcommerceApp:
+    # Awaitable front end for EcommerceApp. Calls run on a bounded thread pool so the
+    # event loop never blocks; at most `max_pending` calls are admitted at once and
+    # further callers wait (backpressure). Calls for the same user run in the order
+    # they were made.
+    def __init__(self, app: EcommerceApp = None, max_workers: int = 4, max_pending: int = 1000):
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("Invalid pool settings")
+        self.app = app if app is not None else EcommerceApp(thread_safe=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = asyncio.Semaphore(max_pending)
+        self._max_pending = max_pending
+        self._user_tails = {}  # user key -> future resolved when that user's latest call finishes
+        self._admitted = 0
+        self._running = 0
+        self._running_lock = threading.Lock()
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._peak_depth = 0
+
+    async def register_user(self, username: str, password: str, email: str) -> bool:
+        return await self._submit(username.casefold(), self.app.register_user, username, password, email)
+
+    async def register_users(self, rows) -> list:
+        return await self._submit(None, self.app.register_users, list(rows))
+
+    async def add_product(self, name: str, price: float, description: str) -> bool:
+        return await self._submit(None, self.app.add_product, name, price, description)
+
+    async def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
+        return await self._submit(username.casefold(), self.app.add_to_cart, username, product_id, quantity)
+
+    async def checkout(self, username: str, address: str, payment_method: str) -> int:
+        return await self._submit(username.casefold(), self.app.checkout, username, address, payment_method)
+
+    async def track_order(self, order_id: int):
+        return await self._submit(None, self.app.track_order, order_id)
+
+    def metrics(self) -> dict:
+        # queue_depth counts admitted calls not yet running on a worker thread
+        return {
+            'queue_depth': self._admitted - self._running,
+            'running': self._running,
+            'waiting_for_slot': self._waiting,
+            'peak_queue_depth': self._peak_depth,
+            'completed': self._completed,
+            'failed': self._failed,
+            'capacity': self._max_pending,
+        }
+
+    async def _submit(self, key, func, *args):
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._admitted += 1
+        self._peak_depth = max(self._peak_depth, self._admitted - self._running)
+        loop = asyncio.get_running_loop()
+        previous = done = None
+        if key is not None:
+            previous = self._user_tails.get(key)
+            done = loop.create_future()
+            self._user_tails[key] = done
+        if previous is not None:
+            try:
+                await asyncio.shield(previous)
+            except BaseException:
+                # Cancelled while queued: this call never runs, but later calls for the
+                # user are released only once the earlier one finishes
+                previous.add_done_callback(lambda _: self._release(key, done))
+                self._free_slot()
+                raise
+        future = loop.run_in_executor(self._executor, functools.partial(self._call, func, args))
+        # The slot and the user's turn are held until the worker thread is done, even
+        # if the caller is cancelled and stops waiting
+        future.add_done_callback(lambda _: self._finished(future, key, done))
+        return await asyncio.shield(future)
+
+    def _finished(self, future, key, done):
+        self._completed += 1
+        if future.cancelled() or future.exception() is not None:
+            self._failed += 1
+        if done is not None:
+            self._release(key, done)
+        self._free_slot()
+
+    def _free_slot(self):
+        self._admitted -= 1
+        self._slots.release()
+
+    def _release(self, key, done):
+        done.set_result(None)
+        if self._user_tails.get(key) is done:
+            del self._user_tails[key]
+
+    def _call(self, func, args):
+        # Runs on a worker thread
+        with self._running_lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._running_lock:
+                self._running -= 1
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
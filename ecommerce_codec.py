@@ -0,0 +1,245 @@
+import gc
+
+from complete_code import ORDER_STATUSES, PAYMENT_METHODS, LineItem, Order, Product, ShoppingCart, User
+
+# Compact binary encoding of the complete_code model classes. Every blob starts with
+# MAGIC, the codec version and a record kind, followed by a record count and the
+# records. Integers are unsigned LEB128 varints, strings are varint-length-prefixed
+# UTF-8 and prices are integer micro-units, so nothing passes through floats.
+MAGIC = b'ECB'
+CODEC_VERSION = 1
+KIND_USERS, KIND_PRODUCTS, KIND_ORDERS, KIND_CARTS = 1, 2, 3, 4
+
+
+# Primitives
+
+def _put_varint(out: bytearray, value: int):
+    if value < 0:
+        raise ValueError("Cannot encode a negative number")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_string(out: bytearray, text: str):
+    data = text.encode('utf-8')
+    _put_varint(out, len(data))
+    out += data
+
+
+def _put_optional_id(out: bytearray, value):
+    # None is stored as 0 and every ID shifted up by one
+    _put_varint(out, 0 if value is None else value + 1)
+
+
+class _Reader:
+    __slots__ = ('data', 'position', '_strings')
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.position = 0
+        self._strings = {}  # Usernames, addresses etc. repeat a lot; decode each once
+
+    def varint(self) -> int:
+        data = self.data
+        position = self.position
+        byte = data[position]
+        position += 1
+        if byte < 0x80:  # Most quantities, IDs and lengths fit in one byte
+            self.position = position
+            return byte
+        value = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        self.position = position
+        return value
+
+    def string(self) -> str:
+        length = self.varint()
+        start = self.position
+        end = start + length
+        if end > len(self.data):
+            raise IndexError("string runs past the end of the data")
+        self.position = end
+        raw = self.data[start:end]
+        text = self._strings.get(raw)
+        if text is None:
+            text = self._strings[raw] = raw.decode('utf-8')
+        return text
+
+    def optional_id(self):
+        value = self.varint()
+        return None if value == 0 else value - 1
+
+
+def _encode(kind: int, records, write) -> bytes:
+    body = bytearray()
+    count = 0
+    for record in records:
+        write(body, record)
+        count += 1
+    out = bytearray(MAGIC)
+    _put_varint(out, CODEC_VERSION)
+    out.append(kind)
+    _put_varint(out, count)
+    out += body
+    return bytes(out)
+
+
+def _decode(data, kind: int, read) -> list:
+    reader = _Reader(data)
+    if reader.data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not encoded data")
+    reader.position = len(MAGIC)
+    # Decoding allocates objects that all survive; pausing the cyclic collector keeps
+    # it from rescanning them over and over on large inputs
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        if reader.varint() != CODEC_VERSION:
+            raise ValueError("Unsupported codec version")
+        if reader.data[reader.position] != kind:
+            raise ValueError("Wrong record kind")
+        reader.position += 1
+        records = [read(reader) for _ in range(reader.varint())]
+    except (IndexError, UnicodeDecodeError):
+        raise ValueError("Corrupt encoded data")
+    finally:
+        if collecting:
+            gc.enable()
+    if reader.position != len(reader.data):
+        raise ValueError("Corrupt encoded data")
+    return records
+
+
+# Users
+
+def _write_user(out: bytearray, user: User):
+    _put_string(out, user.username)
+    _put_string(out, user.password)
+    _put_string(out, user.email)
+
+
+def _read_user(reader: _Reader) -> User:
+    return User._view(reader.string(), reader.string(), reader.string())
+
+
+def encode_users(users) -> bytes:
+    return _encode(KIND_USERS, users, _write_user)
+
+
+def decode_users(data) -> list:
+    return _decode(data, KIND_USERS, _read_user)
+
+
+# Products
+
+def _write_product(out: bytearray, product: Product):
+    _put_optional_id(out, product.product_id)
+    _put_string(out, product.name)
+    _put_varint(out, product.price_micros)
+    _put_string(out, product.description)
+
+
+def _read_product(reader: _Reader) -> Product:
+    product_id = reader.optional_id()
+    return Product._view(product_id, reader.string(), reader.varint(), reader.string())
+
+
+def encode_products(products) -> bytes:
+    return _encode(KIND_PRODUCTS, products, _write_product)
+
+
+def decode_products(data) -> list:
+    return _decode(data, KIND_PRODUCTS, _read_product)
+
+
+# Orders
+
+def _line_item(item) -> LineItem:
+    # Orders built directly from cart dicts carry Product objects instead of IDs
+    if isinstance(item, LineItem):
+        return item
+    product = item['product']
+    if product.product_id is None:
+        raise ValueError("Order item product is not in a catalog")
+    return LineItem(product.product_id, product.price_micros, item['quantity'])
+
+
+def _write_order(out: bytearray, order: Order):
+    _put_optional_id(out, order.order_id)
+    _put_string(out, order.user.username)
+    _put_string(out, order.address)
+    out.append(PAYMENT_METHODS.index(order.payment_method))
+    out.append(ORDER_STATUSES.index(order.status))
+    _put_varint(out, order.total_micros)
+    _put_varint(out, len(order.items))
+    for item in order.items:
+        product_id, unit_price_micros, quantity = _line_item(item)
+        _put_varint(out, product_id)
+        _put_varint(out, unit_price_micros)
+        _put_varint(out, quantity)
+
+
+def encode_orders(orders) -> bytes:
+    return _encode(KIND_ORDERS, orders, _write_order)
+
+
+def decode_orders(data, users: dict) -> list:
+    # `users` maps usernames to the User objects the orders should point at
+    new_line_item = tuple.__new__  # Skips namedtuple's Python-level __new__
+    def read(reader: _Reader) -> Order:
+        order_id = reader.optional_id()
+        username = reader.string()
+        user = users.get(username)
+        if user is None:
+            raise ValueError(f"Unknown user in order data: {username}")
+        address = reader.string()
+        payment_method = PAYMENT_METHODS[reader.data[reader.position]]
+        status = ORDER_STATUSES[reader.data[reader.position + 1]]
+        reader.position += 2
+        total_micros = reader.varint()
+        varint = reader.varint
+        items = []
+        for _ in range(varint()):
+            items.append(new_line_item(LineItem, (varint(), varint(), varint())))
+        items = tuple(items)
+        return Order._view(order_id, user, items, address, payment_method, status, total_micros)
+    return _decode(data, KIND_ORDERS, read)
+
+
+# Carts
+
+def _write_cart(out: bytearray, entry):
+    username, cart = entry
+    _put_string(out, username)
+    lines = cart.view_cart()
+    _put_varint(out, len(lines))
+    for item in lines:
+        product = item['product']
+        if product.product_id is None:
+            raise ValueError("Cart product is not in a catalog")
+        _put_varint(out, product.product_id)
+        _put_varint(out, item['quantity'])
+
+
+def encode_carts(carts) -> bytes:
+    # `carts` maps usernames to ShoppingCarts (EcommerceApp.carts works as is)
+    return _encode(KIND_CARTS, carts.items(), _write_cart)
+
+
+def decode_carts(data, products) -> dict:
+    # `products` is indexed by product ID, e.g. EcommerceApp.products
+    def read(reader: _Reader):
+        username = reader.string()
+        cart = ShoppingCart()
+        for _ in range(reader.varint()):
+            product_id = reader.varint()
+            cart._restore_line(products[product_id], reader.varint(), product_id)
+        return username, cart
+    return dict(_decode(data, KIND_CARTS, read))
@@ -0,0 +1,116 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds of the latency buckets in nanoseconds; one extra bucket catches the rest
+BUCKET_BOUNDS_NS = (
+    1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000, 500_000,
+    1_000_000, 2_000_000, 5_000_000, 10_000_000, 20_000_000, 50_000_000,
+    100_000_000, 200_000_000, 500_000_000, 1_000_000_000,
+)
+
+
+class LatencyHistogram:
+    # Fixed-bucket latency histogram; recording is a bisection and two additions
+    def __init__(self, bounds=BUCKET_BOUNDS_NS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_ns = 0
+
+    def record(self, elapsed_ns: int):
+        self.counts[bisect_left(self.bounds, elapsed_ns)] += 1
+        self.total_ns += elapsed_ns
+
+    def percentile_ns(self, fraction: float):
+        # Upper bound of the bucket holding the given fraction of calls (None past the last bound)
+        target = fraction * sum(self.counts)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else None
+        return 0
+
+
+class MethodStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.value_errors = {}  # error message -> count
+        self.histogram = LatencyHistogram()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'value_errors': dict(self.value_errors),
+                'total_ns': self.histogram.total_ns,
+                'buckets': list(zip(self.histogram.bounds + (None,), self.histogram.counts)),
+                'p50_ns': self.histogram.percentile_ns(0.50),
+                'p99_ns': self.histogram.percentile_ns(0.99),
+            }
+
+
+class AppInstrumentation:
+    # Opt-in latency and error metrics for the public methods of one EcommerceApp.
+    # enable() shadows each public method with a timing wrapper on the instance;
+    # disable() removes the wrappers, so a disabled app runs the plain methods.
+    def __init__(self, app):
+        self.app = app
+        self.method_names = sorted(
+            name for name in dir(type(app))
+            if not name.startswith('_') and callable(getattr(type(app), name, None))
+            and not isinstance(getattr(type(app), name), type))
+        self._stats = {name: MethodStats() for name in self.method_names}
+        self.enabled = False
+
+    def enable(self):
+        if self.enabled:
+            return
+        for name in self.method_names:
+            setattr(self.app, name, self._wrap(getattr(self.app, name), self._stats[name]))
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for name in self.method_names:
+            delattr(self.app, name)
+        self.enabled = False
+
+    def reset(self):
+        self._stats = {name: MethodStats() for name in self.method_names}
+        if self.enabled:
+            self.disable()
+            self.enable()
+
+    def snapshot(self) -> dict:
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    @staticmethod
+    def _wrap(method, stats: MethodStats):
+        clock = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            except ValueError as error:
+                message = str(error)
+                with stats.lock:
+                    stats.value_errors[message] = stats.value_errors.get(message, 0) + 1
+                raise
+            finally:
+                elapsed = clock() - started
+                with stats.lock:
+                    stats.calls += 1
+                    stats.histogram.record(elapsed)
+        return timed
+
+
+def instrument(app) -> AppInstrumentation:
+    instrumentation = AppInstrumentation(app)
+    instrumentation.enable()
+    return instrumentation
@@ -0,0 +1,190 @@
+import json
+import os
+
+from complete_code import EcommerceApp, LineItem, Order, Product, User
+
+SNAPSHOT_VERSION = 2
+
+
+class PersistentEcommerceApp(EcommerceApp):
+    # EcommerceApp that survives restarts. Every successful mutation is appended to a
+    # write-ahead log (one JSON record per line, fsync'd in batches); a compact snapshot
+    # of the full state is written every `snapshot_every` records and the log is reset.
+    # Opening the same directory again loads the snapshot and replays the log tail.
+    def __init__(self, directory: str, sync_every: int = 64, snapshot_every: int = 100000):
+        super().__init__()
+        if sync_every < 1 or snapshot_every < 1:
+            raise ValueError("Invalid persistence settings")
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, 'wal.log')
+        self._snapshot_path = os.path.join(directory, 'snapshot.json')
+        self._sync_every = sync_every
+        self._snapshot_every = snapshot_every
+        self._sequence = 0  # Sequence number of the last applied record
+        self._unsynced = 0
+        self._since_snapshot = 0
+        self._replaying = True
+        self._recover()
+        self._replaying = False
+        self._log = open(self._log_path, 'a', encoding='utf-8')
+
+    # Mutations
+
+    def _add_user(self, user: User):
+        super()._add_user(user)
+        self._append('user', user.username, user.password, user.email)
+
+    def _email_changed(self, user: User):
+        # Logged only after the user object changed, so a snapshot taken by this
+        # append already holds the new email
+        self._append('email', user.username, user.email)
+
+    def _add_product(self, product: Product) -> int:
+        product_id = super()._add_product(product)
+        self._append('product', product.name, product.price, product.description)
+        return product_id
+
+    def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
+        result = super().add_to_cart(username, product_id, quantity)
+        self._append('cart', username, product_id, quantity)
+        return result
+
+    def checkout(self, username: str, address: str, payment_method: str) -> int:
+        order_id = super().checkout(username, address, payment_method)
+        self._append('checkout', username, address, payment_method)
+        return order_id
+
+    def _order_status_changed(self, order: Order, old_status: str):
+        super()._order_status_changed(order, old_status)
+        self._append('status', order.order_id, order.status)
+
+    def update_statuses(self, order_ids, new_status: str) -> list:
+        reports = super().update_statuses(order_ids, new_status)
+        for report in reports:
+            if report['updated']:
+                self._append('status', report['order_id'], new_status)
+        return reports
+
+    # Log and snapshot management
+
+    def _append(self, kind: str, *fields):
+        if self._replaying:
+            return
+        self._sequence += 1
+        self._log.write(json.dumps([self._sequence, kind, *fields], separators=(',', ':')) + '\n')
+        self._unsynced += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self._snapshot_every:
+            self.snapshot()
+        elif self._unsynced >= self._sync_every:
+            self.sync()
+
+    def sync(self):
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def snapshot(self):
+        # The log is only reset after the snapshot is durably in place; records the
+        # snapshot already covers are skipped by sequence number if we crash in between.
+        self.sync()
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'sequence': self._sequence,
+            'users': [[user.username, user.password, user.email] for user in self.users.values()],
+            'products': [[product.name, product.price, product.description] for product in self.products],
+            'carts': {
+                username: [[item['product'].product_id, item['quantity']] for item in cart.view_cart()]
+                for username, cart in self.carts.items() if not cart.is_empty()
+            },
+            'orders': [
+                [order.user.username, [list(item) for item in order.items],
+                 order.address, order.payment_method, order.status]
+                for order in self.orders
+            ],
+        }
+        temp_path = self._snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self._snapshot_path)
+        self._log.close()
+        self._log = open(self._log_path, 'w', encoding='utf-8')
+        self._since_snapshot = 0
+
+    def close(self):
+        self.sync()
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Recovery
+
+    def _recover(self):
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, encoding='utf-8') as file:
+                self._load_snapshot(json.load(file))
+        if not os.path.exists(self._log_path):
+            return
+        valid_end = 0
+        with open(self._log_path, 'rb') as file:
+            for line in file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("Incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn write at the tail of the log
+                valid_end += len(line)
+                if record[0] <= self._sequence:
+                    continue
+                self._apply(record[1], record[2:])
+                self._sequence = record[0]
+                self._since_snapshot += 1
+        # Drop a torn tail so new records are not appended after it
+        if valid_end < os.path.getsize(self._log_path):
+            os.truncate(self._log_path, valid_end)
+
+    def _load_snapshot(self, state: dict):
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version")
+        for username, password, email in state['users']:
+            self._add_user(User(username, password, email))
+        for name, price, description in state['products']:
+            self._add_product(Product(name, price, description))
+        for username, items in state['carts'].items():
+            for product_id, quantity in items:
+                # Merged lines can exceed the per-call limit of 100, so re-add in steps
+                while quantity > 0:
+                    step = min(quantity, 100)
+                    self.add_to_cart(username, product_id, step)
+                    quantity -= step
+        for username, items, address, payment_method, status in state['orders']:
+            items = tuple(LineItem(*item) for item in items)
+            order = Order(self.users[username], items, address, payment_method)
+            order.status = status
+            self._add_order(order)
+        self._sequence = state['sequence']
+
+    def _apply(self, kind: str, fields: list):
+        if kind == 'user':
+            self._add_user(User(*fields))
+        elif kind == 'email':
+            username, new_email = fields
+            self.users[username].update_email(new_email)
+        elif kind == 'product':
+            self._add_product(Product(*fields))
+        elif kind == 'cart':
+            self.add_to_cart(*fields)
+        elif kind == 'checkout':
+            self.checkout(*fields)
+        elif kind == 'status':
+            order_id, status = fields
+            self.track_order(order_id).update_status(status)
+        else:
+            raise ValueError(f"Unknown log record: {kind}")
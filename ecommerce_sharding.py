@@ -0,0 +1,146 @@
+import multiprocessing
+import threading
+import zlib
+
+from complete_code import EcommerceApp, Product
+
+
+def shard_for(username: str, shard_count: int) -> int:
+    # Stable across processes and runs, unlike hash(); case variants land on one shard
+    return zlib.crc32(username.casefold().encode('utf-8')) % shard_count
+
+
+def _serve_shard(connection):
+    # Worker process loop: run each (method, args) request against the local app
+    app = EcommerceApp()
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            connection.send(('ok', getattr(app, method)(*args)))
+        except Exception as error:
+            connection.send(('error', type(error).__name__, str(error)))
+    connection.close()
+
+
+class _Shard:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve_shard, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.lock = threading.Lock()  # One request in flight per shard
+
+    def call(self, method: str, *args):
+        with self.lock:
+            self.connection.send((method, args))
+            reply = self.connection.recv()
+        if reply[0] == 'error':
+            _, error_type, message = reply
+            if error_type == 'TypeError':
+                raise TypeError(message)
+            if error_type == 'ValueError':
+                raise ValueError(message)
+            raise RuntimeError(f"{error_type} on shard: {message}")
+        return reply[1]
+
+    def close(self):
+        with self.lock:
+            self.connection.send(None)
+            self.connection.close()
+        self.process.join()
+
+
+class ShardedEcommerceApp:
+    # The EcommerceApp API spread over worker processes. Users, carts and orders live
+    # on the shard chosen by a hash of the casefolded username; the product catalog is
+    # replicated to every shard. Order IDs are global: local_id * shard_count + shard.
+    # Objects returned by the router are copies; change orders through the router.
+    def __init__(self, shard_count: int = 4, start_method: str = None):
+        if shard_count < 1:
+            raise ValueError("Invalid shard count")
+        context = multiprocessing.get_context(start_method)
+        self.shard_count = shard_count
+        self._shards = [_Shard(context) for _ in range(shard_count)]
+        # Emails must be unique across shards, so the router owns that index
+        self._emails = set()
+        self._emails_lock = threading.Lock()
+        self._catalog_lock = threading.Lock()
+        self._catalog_diverged = False  # Set if a product reached only some shards
+
+    def _shard(self, username: str) -> _Shard:
+        return self._shards[shard_for(username, self.shard_count)]
+
+    def register_user(self, username: str, password: str, email: str) -> bool:
+        email_key = email.strip().casefold()
+        with self._emails_lock:
+            if email_key in self._emails:
+                raise ValueError("Username or email already exists")
+            self._emails.add(email_key)  # Reserve while the shard registers the user
+        try:
+            return self._shard(username).call('register_user', username, password, email)
+        except Exception:
+            with self._emails_lock:
+                self._emails.discard(email_key)
+            raise
+
+    def add_product(self, name: str, price: float, description: str) -> bool:
+        product = Product(name, price, description)  # Reject invalid products before replicating
+        with self._catalog_lock:  # Keeps product IDs identical on every shard
+            self._check_catalog()
+            product_ids = []
+            try:
+                for shard in self._shards:
+                    product_ids.append(shard.call('_add_product', product))
+            except Exception as error:
+                if not product_ids:
+                    raise  # Nothing was added anywhere
+                self._catalog_diverged = True
+                raise RuntimeError("Product was added to only some shards; shard catalogs have diverged") from error
+            if len(set(product_ids)) != 1:
+                self._catalog_diverged = True
+                raise RuntimeError("Shards assigned different product IDs; shard catalogs have diverged")
+        return True
+
+    def _check_catalog(self):
+        # Product IDs no longer mean the same product on every shard
+        if self._catalog_diverged:
+            raise RuntimeError("Shard catalogs have diverged")
+
+    def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
+        self._check_catalog()
+        return self._shard(username).call('add_to_cart', username, product_id, quantity)
+
+    def checkout(self, username: str, address: str, payment_method: str) -> int:
+        shard_index = shard_for(username, self.shard_count)
+        local_id = self._shards[shard_index].call('checkout', username, address, payment_method)
+        return local_id * self.shard_count + shard_index
+
+    def track_order(self, order_id: int):
+        # A read-only snapshot: calling update_status on it does not reach the shard
+        if order_id < 0:
+            raise ValueError("Invalid order ID")
+        local_id, shard_index = divmod(order_id, self.shard_count)
+        order = self._shards[shard_index].call('track_order', local_id)
+        order.order_id = order_id
+        return order
+
+    def update_order_status(self, order_id: int, new_status: str):
+        if order_id < 0:
+            raise ValueError("Invalid order ID")
+        local_id, shard_index = divmod(order_id, self.shard_count)
+        report, = self._shards[shard_index].call('update_statuses', [local_id], new_status)
+        if report['error'] is not None:
+            raise ValueError(report['error'])
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,242 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from complete_code import ORDER_STATUSES, LineItem, Order, Product, User
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    username_key TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    email TEXT NOT NULL,
+    email_key TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    price_micros INTEGER NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cart_items (
+    username TEXT NOT NULL REFERENCES users(username),
+    product_id INTEGER NOT NULL REFERENCES products(product_id),
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (username, product_id)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL REFERENCES users(username),
+    address TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_by_status ON orders(status, order_id);
+CREATE INDEX IF NOT EXISTS orders_by_user ON orders(username, order_id);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER NOT NULL REFERENCES orders(order_id),
+    line INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    unit_price_micros INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (order_id, line)
+);
+"""
+
+
+class ConnectionPool:
+    # Fixed set of SQLite connections shared by worker threads. Connections run in
+    # autocommit mode; transactions are opened explicitly by the caller.
+    def __init__(self, path: str, size: int = 4, timeout: float = 30.0):
+        if size < 1:
+            raise ValueError("Invalid pool size")
+        self._idle = queue.Queue()
+        self._timeout = timeout
+        for _ in range(size):
+            connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self._idle.put(connection)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        connection = self._idle.get(timeout=self._timeout)
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get(timeout=self._timeout).close()
+
+
+class SQLiteEcommerceApp:
+    # The EcommerceApp API backed by a SQLite database file. Validation reuses the
+    # model classes from complete_code so error messages are identical.
+    def __init__(self, path: str, pool_size: int = 4):
+        self._pool = ConnectionPool(path, pool_size)
+        self._local = threading.local()  # Connection of this thread's open batch, if any
+        with self._pool.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self, write: bool = True):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            yield connection  # Part of an enclosing batch()
+            return
+        with self._pool.connection() as connection:
+            connection.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    @contextmanager
+    def batch(self):
+        # Group many calls from this thread into one transaction and one commit.
+        # A ValueError inside the batch only discards that call, not the batch.
+        if getattr(self._local, 'connection', None) is not None:
+            yield self
+            return
+        with self._transaction() as connection:
+            self._local.connection = connection
+            try:
+                yield self
+            finally:
+                self._local.connection = None
+
+    @contextmanager
+    def _savepoint(self):
+        # Lets a failing call inside batch() undo only its own statements
+        with self._transaction() as connection:
+            if getattr(self._local, 'connection', None) is None:
+                yield connection
+                return
+            connection.execute('SAVEPOINT call')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK TO call')
+                connection.execute('RELEASE call')
+                raise
+            connection.execute('RELEASE call')
+
+    def close(self):
+        self._pool.close()
+
+    def register_user(self, username: str, password: str, email: str) -> bool:
+        with self._savepoint() as connection:
+            # Duplicates are reported before validation errors, as in EcommerceApp
+            if connection.execute('SELECT 1 FROM users WHERE username_key = ? OR email_key = ?',
+                                  (username.casefold(), email.strip().casefold())).fetchone() is not None:
+                raise ValueError("Username or email already exists")
+            new_user = User(username, password, email)
+            try:
+                connection.execute(
+                    'INSERT INTO users VALUES (?, ?, ?, ?, ?)',
+                    (new_user.username, username.casefold(), new_user.password, new_user.email,
+                     new_user.email.casefold()))
+            except sqlite3.IntegrityError:
+                raise ValueError("Username or email already exists")
+        return True
+
+    def add_product(self, name: str, price: float, description: str) -> bool:
+        new_product = Product(name, price, description)
+        with self._savepoint() as connection:
+            connection.execute(
+                'INSERT INTO products VALUES ((SELECT COALESCE(MAX(product_id) + 1, 0) FROM products), ?, ?, ?)',
+                (new_product.name, new_product.price_micros, new_product.description))
+        return True
+
+    def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
+        with self._savepoint() as connection:
+            if connection.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone() is None:
+                raise ValueError("User not registered")
+            if product_id < 0 or connection.execute(
+                    'SELECT 1 FROM products WHERE product_id = ?', (product_id,)).fetchone() is None:
+                raise ValueError("Invalid product ID")
+            if not isinstance(quantity, int):
+                raise TypeError("Quantity must be an integer")
+            if quantity < 1 or quantity > 100:
+                raise ValueError("Invalid quantity")
+            connection.execute(
+                'INSERT INTO cart_items VALUES (?, ?, ?) '
+                'ON CONFLICT(username, product_id) DO UPDATE SET quantity = quantity + excluded.quantity',
+                (username, product_id, quantity))
+        return True
+
+    def view_cart(self, username: str) -> list:
+        with self._transaction(write=False) as connection:
+            rows = connection.execute(
+                'SELECT product_id, quantity FROM cart_items WHERE username = ? ORDER BY rowid',
+                (username,)).fetchall()
+            return [{'product': self._load_product(connection, product_id), 'quantity': quantity}
+                    for product_id, quantity in rows]
+
+    def checkout(self, username: str, address: str, payment_method: str) -> int:
+        with self._savepoint() as connection:
+            user = self._load_user(connection, username)
+            rows = connection.execute(
+                'SELECT cart_items.product_id, products.price_micros, cart_items.quantity '
+                'FROM cart_items JOIN products USING (product_id) WHERE username = ? ORDER BY cart_items.rowid',
+                (username,)).fetchall()
+            if user is None or not rows:
+                raise ValueError("Cart is empty")
+            new_order = Order(user, tuple(LineItem(*row) for row in rows), address, payment_method)
+            # Primary key lookup rather than a COUNT(*) scan while holding the write lock
+            order_id = connection.execute('SELECT COALESCE(MAX(order_id) + 1, 0) FROM orders').fetchone()[0]
+            connection.execute('INSERT INTO orders VALUES (?, ?, ?, ?, ?)',
+                               (order_id, username, new_order.address, new_order.payment_method, new_order.status))
+            connection.executemany('INSERT INTO order_items VALUES (?, ?, ?, ?, ?)',
+                                   [(order_id, line, *item) for line, item in enumerate(new_order.items)])
+            connection.execute('DELETE FROM cart_items WHERE username = ?', (username,))
+        return order_id
+
+    def track_order(self, order_id: int):
+        with self._transaction(write=False) as connection:
+            return self._load_order(connection, order_id)
+
+    def update_order_status(self, order_id: int, new_status: str):
+        with self._savepoint() as connection:
+            order = self._load_order(connection, order_id)
+            order.update_status(new_status)
+            connection.execute('UPDATE orders SET status = ? WHERE order_id = ?', (order.status, order_id))
+
+    def order_ids_by_status(self, status: str) -> list:
+        if status not in ORDER_STATUSES:
+            raise ValueError("Invalid status")
+        with self._transaction(write=False) as connection:
+            rows = connection.execute('SELECT order_id FROM orders WHERE status = ? ORDER BY order_id', (status,))
+            return [order_id for order_id, in rows]
+
+    def _load_user(self, connection, username: str):
+        row = connection.execute('SELECT username, password, email FROM users WHERE username = ?',
+                                 (username,)).fetchone()
+        return User(*row) if row is not None else None
+
+    def _load_product(self, connection, product_id: int) -> Product:
+        name, price_micros, description = connection.execute(
+            'SELECT name, price_micros, description FROM products WHERE product_id = ?', (product_id,)).fetchone()
+        return Product._view(product_id, name, price_micros, description)
+
+    def _load_order(self, connection, order_id: int) -> Order:
+        row = connection.execute(
+            'SELECT username, address, payment_method, status FROM orders WHERE order_id = ?',
+            (order_id,)).fetchone()
+        if row is None:
+            raise ValueError("Invalid order ID")
+        username, address, payment_method, status = row
+        items = tuple(LineItem(*row) for row in connection.execute(
+            'SELECT product_id, unit_price_micros, quantity FROM order_items WHERE order_id = ? ORDER BY line',
+            (order_id,)))
+        order = Order(self._load_user(connection, username), items, address, payment_method)
+        order.status = status
+        order.order_id = order_id
+        return order
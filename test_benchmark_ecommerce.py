@@ -0,0 +1,39 @@
+import json
+
+from benchmark_ecommerce import OPERATIONS, compare, main, run_scale
+
+
+def test_run_scale_reports_every_operation():
+    """
+    General Case: One small scale step times every operation.
+    """
+    step = run_scale(200)
+    assert step['scale'] == 200
+    assert step['peak_rss_kb'] > 0
+    for name in OPERATIONS:
+        stats = step['operations'][name]
+        assert stats['calls'] == 200
+        assert stats['ops_per_sec'] > 0
+        assert stats['p50_us'] <= stats['p99_us']
+
+
+def test_compare_flags_throughput_drops():
+    """
+    Edge Case: Only drops beyond the threshold count as regressions.
+    """
+    def report(rate):
+        return {'steps': [{'scale': 10, 'operations': {'checkout': {'ops_per_sec': rate}}}]}
+    assert compare(report(1000.0), report(950.0), 0.10) == []
+    regressions = compare(report(1000.0), report(800.0), 0.10)
+    assert [(r['scale'], r['operation'], round(r['ratio'], 2)) for r in regressions] == [(10, 'checkout', 0.8)]
+
+
+def test_main_saves_and_compares_results(tmp_path):
+    """
+    General Case: Results are saved as JSON and can be compared against a later run.
+    """
+    output = tmp_path / 'baseline.json'
+    assert main(['--scales', '50', '--output', str(output)]) == 0
+    saved = json.loads(output.read_text())
+    assert [step['scale'] for step in saved['steps']] == [50]
+    assert main(['--scales', '50', '--compare', str(output), '--threshold', '1.0']) == 0
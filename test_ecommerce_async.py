@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+import pytest
+from complete_code import EcommerceApp
+from ecommerce_async import AsyncEcommerceApp
+
+
+def test_async_flow():
+    """
+    General Case: The awaitable methods mirror EcommerceApp.
+    """
+    async def scenario():
+        async with AsyncEcommerceApp(max_workers=2) as shop:
+            assert await shop.register_user('johndoe', 'Password123!', 'johndoe@example.com') is True
+            assert await shop.add_product('Laptop', 999.99, 'A high-performance laptop') is True
+            assert await shop.add_to_cart('johndoe', 0, 2) is True
+            order_id = await shop.checkout('johndoe', '123 Main St', 'credit_card')
+            order = await shop.track_order(order_id)
+            assert order.items[0]['quantity'] == 2
+            with pytest.raises(ValueError, match="Cart is empty"):
+                await shop.checkout('johndoe', '123 Main St', 'credit_card')
+            metrics = shop.metrics()
+            assert metrics['queue_depth'] == 0
+            assert metrics['completed'] == 6
+            assert metrics['failed'] == 1
+    asyncio.run(scenario())
+
+
+def test_async_per_user_ordering():
+    """
+    Edge Case: Calls for one user run in submission order even when many are in flight at once.
+    """
+    async def scenario():
+        app = EcommerceApp(thread_safe=True)
+        async with AsyncEcommerceApp(app, max_workers=8) as shop:
+            await shop.add_product('Laptop', 999.99, 'A high-performance laptop')
+            await shop.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+            calls = []
+            for _ in range(20):
+                calls.append(shop.add_to_cart('johndoe', 0, 1))
+                calls.append(shop.checkout('johndoe', '123 Main St', 'paypal'))
+            results = await asyncio.gather(*calls)
+        # Each checkout saw exactly the single item added just before it
+        order_ids = results[1::2]
+        assert order_ids == sorted(order_ids)
+        assert all(app.track_order(order_id).items[0]['quantity'] == 1 for order_id in order_ids)
+    asyncio.run(scenario())
+
+
+def test_async_backpressure_bounds_admitted_calls():
+    """
+    Edge Case: No more than max_pending calls are admitted; the rest wait for a slot.
+    """
+    release = threading.Event()
+
+    class SlowApp(EcommerceApp):
+        def add_product(self, name, price, description):
+            release.wait()
+            return super().add_product(name, price, description)
+
+    async def scenario():
+        async with AsyncEcommerceApp(SlowApp(thread_safe=True), max_workers=1, max_pending=3) as shop:
+            tasks = [asyncio.create_task(shop.add_product(f'Product {index}', 1.0, '')) for index in range(10)]
+            await asyncio.sleep(0.05)
+            metrics = shop.metrics()
+            assert metrics['running'] == 1
+            assert metrics['queue_depth'] == 2
+            assert metrics['waiting_for_slot'] == 7
+            release.set()
+            await asyncio.gather(*tasks)
+            assert len(shop.app.products) == 10
+            assert shop.metrics()['peak_queue_depth'] <= 3
+    asyncio.run(scenario())
+
+
+def test_cancelled_running_call_keeps_user_order_and_slot():
+    """
+    Edge Case: Cancelling a call that is already running does not let the user's next call or another slot start early.
+    """
+    started = threading.Event()
+    release = threading.Event()
+    log = []
+
+    class SlowApp(EcommerceApp):
+        def add_to_cart(self, username, product_id, quantity):
+            log.append(('start', quantity))
+            if quantity == 1:
+                started.set()
+                release.wait()
+            log.append(('end', quantity))
+            return super().add_to_cart(username, product_id, quantity)
+
+    async def scenario():
+        app = SlowApp(thread_safe=True)
+        app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+        app.add_product('Laptop', 999.99, 'A high-performance laptop')
+        async with AsyncEcommerceApp(app, max_workers=4, max_pending=1) as shop:
+            first = asyncio.create_task(shop.add_to_cart('johndoe', 0, 1))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            first.cancel()
+            second = asyncio.create_task(shop.add_to_cart('johndoe', 0, 2))
+            try:
+                await asyncio.sleep(0.05)
+                assert log == [('start', 1)]
+                assert shop.metrics()['waiting_for_slot'] == 1
+            finally:
+                release.set()
+            assert await second is True
+            with pytest.raises(asyncio.CancelledError):
+                await first
+        assert log == [('start', 1), ('end', 1), ('start', 2), ('end', 2)]
+        assert app.carts['johndoe'].view_cart()[0]['quantity'] == 3
+    asyncio.run(scenario())
+
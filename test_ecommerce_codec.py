@@ -0,0 +1,93 @@
+import pytest
+from complete_code import EcommerceApp, Order, Product
+from ecommerce_codec import (decode_carts, decode_orders, decode_products, decode_users, encode_carts,
+                             encode_orders, encode_products, encode_users)
+
+
+def populated_app():
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.register_user('janedoe', 'Password123!', 'janedoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Tee', 0.000001, 'Cheapest thing in the catalog, ünïcödé')
+    app.add_to_cart('johndoe', 0, 1)
+    app.add_to_cart('johndoe', 1, 100)
+    order_id = app.checkout('johndoe', '123 Main St', 'paypal')
+    app.track_order(order_id).update_status('Shipped')
+    app.add_to_cart('janedoe', 1, 100)
+    app.add_to_cart('janedoe', 1, 50)  # Merged line above the per-call limit
+    return app
+
+
+def test_round_trip_all_model_classes():
+    """
+    General Case: Users, products, orders and carts decode to equal objects with exact prices.
+    """
+    app = populated_app()
+    users = decode_users(encode_users(app.users.values()))
+    assert [(user.username, user.password, user.email) for user in users] == \
+        [(user.username, user.password, user.email) for user in app.users.values()]
+
+    products = decode_products(encode_products(app.products))
+    assert [(p.product_id, p.name, p.price_micros, p.description) for p in products] == \
+        [(0, 'Laptop', 999990000, 'A high-performance laptop'),
+         (1, 'Tee', 1, 'Cheapest thing in the catalog, ünïcödé')]
+
+    by_name = {user.username: user for user in users}
+    order, = decode_orders(encode_orders(app.orders), by_name)
+    original = app.track_order(0)
+    assert (order.order_id, order.address, order.payment_method, order.status, order.total_micros) == \
+        (0, '123 Main St', 'paypal', 'Shipped', original.total_micros)
+    assert order.items == original.items
+    assert order.user is by_name['johndoe']
+
+    carts = decode_carts(encode_carts(app.carts), app.products)
+    assert set(carts) == {'janedoe'}
+    assert [item['quantity'] for item in carts['janedoe'].view_cart()] == [150]
+    assert carts['janedoe'].subtotal_micros == app.carts['janedoe'].subtotal_micros
+
+
+def test_encoding_is_compact():
+    """
+    General Case: An order takes far fewer bytes than its JSON form.
+    """
+    app = populated_app()
+    for _ in range(100):
+        app.add_to_cart('johndoe', 0, 2)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    data = encode_orders(app.orders)
+    assert len(data) < 40 * len(app.orders)
+    assert len(decode_orders(data, app.users)) == 101
+
+
+def test_orders_built_from_cart_dicts():
+    """
+    Edge Case: Dict items are stored as line items; products outside a catalog are rejected.
+    """
+    app = populated_app()
+    order = Order(app.users['johndoe'], [{'product': app.products[0], 'quantity': 3}], '1 Elm St', 'debit_card')
+    decoded, = decode_orders(encode_orders([order]), app.users)
+    assert [tuple(item) for item in decoded.items] == [(0, 999990000, 3)]
+    assert decoded.order_id is None
+    loose = Order(app.users['johndoe'], [{'product': Product('Pen', 1.5, ''), 'quantity': 1}], '1 Elm St', 'paypal')
+    with pytest.raises(ValueError, match="not in a catalog"):
+        encode_orders([loose])
+
+
+def test_rejects_foreign_or_damaged_data():
+    """
+    Edge Case: Wrong magic, wrong kind, other versions, truncation and trailing bytes all raise ValueError.
+    """
+    data = encode_products(populated_app().products)
+    with pytest.raises(ValueError, match="Not encoded data"):
+        decode_products(b'{"json": true}')
+    with pytest.raises(ValueError, match="Wrong record kind"):
+        decode_users(data)
+    with pytest.raises(ValueError, match="Unsupported codec version"):
+        decode_products(data[:3] + b'\x09' + data[4:])
+    with pytest.raises(ValueError, match="Corrupt encoded data"):
+        decode_products(data[:-5])
+    with pytest.raises(ValueError, match="Corrupt encoded data"):
+        decode_products(data + b'\x00')
+    with pytest.raises(ValueError, match="Unknown user"):
+        decode_orders(encode_orders(populated_app().orders), {})
@@ -0,0 +1,60 @@
+import pytest
+from complete_code import EcommerceApp
+from ecommerce_metrics import LatencyHistogram, instrument
+
+
+def test_instrumentation_counts_calls_and_errors():
+    """
+    General Case: Wrapped methods record call counts, latency buckets and ValueError messages.
+    """
+    app = EcommerceApp()
+    metrics = instrument(app)
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    with pytest.raises(ValueError):
+        app.register_user('JohnDoe', 'Password123!', 'other@example.com')
+    with pytest.raises(ValueError):
+        app.register_user('janedoe', 'short', 'janedoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_to_cart('johndoe', 0, 1)
+    app.checkout('johndoe', '123 Main St', 'credit_card')
+
+    snapshot = metrics.snapshot()
+    register = snapshot['register_user']
+    assert register['calls'] == 3
+    assert register['value_errors'] == {'Username or email already exists': 1, 'Invalid password': 1}
+    assert sum(count for _, count in register['buckets']) == 3
+    assert register['total_ns'] > 0
+    assert snapshot['checkout']['calls'] == 1
+    assert snapshot['track_order']['calls'] == 0
+    assert 'add_product' in metrics.method_names and '_add_user' not in metrics.method_names
+
+
+def test_disable_restores_plain_methods():
+    """
+    Edge Case: Disabling removes the wrappers entirely, so later calls are not recorded.
+    """
+    app = EcommerceApp()
+    metrics = instrument(app)
+    assert 'add_product' in vars(app)
+    metrics.disable()
+    assert 'add_product' not in vars(app)
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    assert metrics.snapshot()['add_product']['calls'] == 0
+    metrics.enable()
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    assert metrics.snapshot()['add_product']['calls'] == 1
+    metrics.reset()
+    assert metrics.snapshot()['add_product']['calls'] == 0
+
+
+def test_histogram_percentiles():
+    """
+    General Case: Percentiles resolve to bucket upper bounds.
+    """
+    histogram = LatencyHistogram(bounds=(10, 100, 1000))
+    for elapsed in (5, 7, 50, 500, 5000):
+        histogram.record(elapsed)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.percentile_ns(0.5) == 100
+    assert histogram.percentile_ns(0.4) == 10
+    assert histogram.percentile_ns(1.0) is None
@@ -0,0 +1,110 @@
+import pytest
+from ecommerce_persistence import PersistentEcommerceApp
+
+
+def populate(app):
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.register_user('janedoe', 'Password123!', 'janedoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    app.add_to_cart('johndoe', 0, 1)
+    app.add_to_cart('johndoe', 1, 2)
+    order_id = app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.track_order(order_id).update_status('Shipped')
+    app.add_to_cart('janedoe', 1, 100)
+    app.add_to_cart('janedoe', 1, 50)  # Merged line above the per-call limit
+    app.users['janedoe'].update_email('jane.new@example.com')
+    return order_id
+
+
+def assert_recovered(app, order_id):
+    assert set(app.users) == {'johndoe', 'janedoe'}
+    assert app.users['janedoe'].email == 'jane.new@example.com'
+    assert [product.name for product in app.products] == ['Laptop', 'Mouse']
+    order = app.track_order(order_id)
+    assert order.status == 'Shipped'
+    assert [tuple(item) for item in order.items] == [(0, 999990000, 1), (1, 19990000, 2)]
+    assert order.total == 1039.97
+    assert app.order_ids_by_status('Shipped') == [order_id]
+    assert 'johndoe' not in app.carts  # Checkout drops the cart
+    assert [item['quantity'] for item in app.carts['janedoe'].view_cart()] == [150]
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('JohnDoe', 'Password123!', 'other@example.com')
+
+
+def test_recover_from_log_only(tmp_path):
+    """
+    General Case: State is rebuilt by replaying the write-ahead log.
+    """
+    with PersistentEcommerceApp(str(tmp_path)) as app:
+        order_id = populate(app)
+    assert_recovered(PersistentEcommerceApp(str(tmp_path)), order_id)
+
+
+def test_recover_from_snapshot_and_log_tail(tmp_path):
+    """
+    General Case: State is rebuilt from a snapshot plus the records logged after it.
+    """
+    with PersistentEcommerceApp(str(tmp_path), snapshot_every=5) as app:
+        order_id = populate(app)
+    assert (tmp_path / 'snapshot.json').exists()
+    recovered = PersistentEcommerceApp(str(tmp_path), snapshot_every=5)
+    assert_recovered(recovered, order_id)
+    recovered.add_product('Keyboard', 49.99, 'Mechanical keyboard')
+    recovered.close()
+    assert len(PersistentEcommerceApp(str(tmp_path)).products) == 3
+
+
+def test_recover_ignores_torn_tail(tmp_path):
+    """
+    Edge Case: A partially written record at the end of the log is discarded, and later records still replay.
+    """
+    with PersistentEcommerceApp(str(tmp_path)) as app:
+        app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    with open(tmp_path / 'wal.log', 'a', encoding='utf-8') as log:
+        log.write('[2,"product","Mou')
+    with PersistentEcommerceApp(str(tmp_path)) as app:
+        assert len(app.products) == 1
+        app.add_product('Keyboard', 49.99, 'Mechanical keyboard')
+    assert [product.name for product in PersistentEcommerceApp(str(tmp_path)).products] == ['Laptop', 'Keyboard']
+
+
+def test_invalid_operations_are_not_logged(tmp_path):
+    """
+    Edge Case: Calls that raise leave nothing behind in the log.
+    """
+    with PersistentEcommerceApp(str(tmp_path)) as app:
+        with pytest.raises(ValueError):
+            app.add_product('', 10.0, 'No name')
+        with pytest.raises(ValueError):
+            app.checkout('nobody', '123 Main St', 'credit_card')
+    assert (tmp_path / 'wal.log').read_text() == ''
+
+
+def test_bulk_status_updates_are_logged(tmp_path):
+    """
+    General Case: Orders moved by update_statuses keep their new status after recovery.
+    """
+    with PersistentEcommerceApp(str(tmp_path)) as app:
+        order_id = populate(app)
+        app.add_to_cart('johndoe', 0, 1)
+        second_id = app.checkout('johndoe', '456 Oak Ave', 'paypal')
+        reports = app.update_statuses([order_id, second_id], 'Delivered')
+        assert [report['updated'] for report in reports] == [True, False]
+    recovered = PersistentEcommerceApp(str(tmp_path))
+    assert recovered.order_ids_by_status('Delivered') == [order_id]
+    assert recovered.order_ids_by_status('Processing') == [second_id]
+
+
+def test_email_change_survives_snapshot_boundary(tmp_path):
+    """
+    Edge Case: An email change whose log record triggers a snapshot is still recovered.
+    """
+    with PersistentEcommerceApp(str(tmp_path), snapshot_every=2) as app:
+        app.register_user('johndoe', 'Password123!', 'j@example.com')
+        app.users['johndoe'].update_email('new@example.com')
+    recovered = PersistentEcommerceApp(str(tmp_path))
+    assert recovered.users['johndoe'].email == 'new@example.com'
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        recovered.register_user('janedoe', 'Password123!', 'new@example.com')
+
@@ -0,0 +1,103 @@
+import pytest
+from ecommerce_sharding import ShardedEcommerceApp, shard_for
+
+
+@pytest.fixture
+def shop():
+    shop = ShardedEcommerceApp(shard_count=3)
+    yield shop
+    shop.close()
+
+
+def test_shard_for_is_case_insensitive_and_stable():
+    """
+    Edge Case: Case variants of a username map to the same shard.
+    """
+    assert shard_for('JohnDoe', 8) == shard_for('johndoe', 8)
+    assert {shard_for(f'user{index}', 4) for index in range(100)} == {0, 1, 2, 3}
+
+
+def test_sharded_flow_and_global_order_ids(shop):
+    """
+    General Case: Orders from users on different shards get globally unique IDs that encode their shard.
+    """
+    shop.add_product('Laptop', 999.99, 'A high-performance laptop')
+    shop.add_product('Mouse', 19.99, 'Wireless mouse')
+    usernames = [f'user{index}' for index in range(12)]
+    for username in usernames:
+        assert shop.register_user(username, 'Password123!', f'{username}@example.com') is True
+    placed = {}
+    for username in usernames:
+        shop.add_to_cart(username, 1, 2)
+        placed[shop.checkout(username, '123 Main St', 'paypal')] = username
+    assert len(placed) == len(usernames)
+    for order_id, username in placed.items():
+        assert order_id % shop.shard_count == shard_for(username, shop.shard_count)
+        order = shop.track_order(order_id)
+        assert order.order_id == order_id
+        assert order.user.username == username
+        assert order.items[0].product_id == 1
+        assert order.total_micros == 2 * 19990000
+
+
+def test_sharded_uniqueness_and_errors(shop):
+    """
+    Edge Case: Usernames and emails stay unique across shards, and shard errors surface as ValueError.
+    """
+    shop.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        shop.register_user('JOHNDOE', 'Password123!', 'other@example.com')
+    other = next(f'user{index}' for index in range(100)
+                 if shard_for(f'user{index}', 3) != shard_for('johndoe', 3))
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        shop.register_user(other, 'Password123!', 'JohnDoe@example.com')
+    with pytest.raises(ValueError, match="Invalid password"):
+        shop.register_user('janedoe', 'short', 'janedoe@example.com')
+    assert shop.register_user('janedoe', 'Password123!', 'janedoe@example.com')  # Email released after failure
+    with pytest.raises(ValueError, match="Invalid product price"):
+        shop.add_product('Free', 0, '')
+    with pytest.raises(ValueError, match="Invalid product ID"):
+        shop.add_to_cart('johndoe', 0, 1)
+    with pytest.raises(ValueError, match="Cart is empty"):
+        shop.checkout('johndoe', '123 Main St', 'paypal')
+    with pytest.raises(ValueError, match="Invalid order ID"):
+        shop.track_order(7)
+
+
+def test_sharded_update_order_status(shop):
+    """
+    General Case: Status changes are routed to the owning shard; illegal ones raise ValueError.
+    """
+    shop.add_product('Laptop', 999.99, 'A high-performance laptop')
+    shop.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    shop.add_to_cart('johndoe', 0, 1)
+    order_id = shop.checkout('johndoe', '123 Main St', 'paypal')
+    shop.update_order_status(order_id, 'Shipped')
+    assert shop.track_order(order_id).status == 'Shipped'
+    with pytest.raises(ValueError, match="Cannot change status from Shipped to Processing"):
+        shop.update_order_status(order_id, 'Processing')
+    with pytest.raises(ValueError, match="Invalid status"):
+        shop.update_order_status(order_id, 'Lost')
+    with pytest.raises(ValueError, match="Invalid order ID"):
+        shop.update_order_status(order_id + shop.shard_count, 'Shipped')
+
+
+def test_partial_product_replication_is_detected(shop):
+    """
+    Edge Case: A product that reaches only some shards stops further catalog use instead of silently diverging.
+    """
+    shop.add_product('Laptop', 999.99, 'A high-performance laptop')
+    shop.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    failing = shop._shards[1]
+
+    def broken_call(method, *args):
+        raise RuntimeError("shard unavailable")
+    failing.call = broken_call
+    with pytest.raises(RuntimeError, match="diverged"):
+        shop.add_product('Mouse', 19.99, 'Wireless mouse')
+    with pytest.raises(RuntimeError, match="diverged"):
+        shop.add_product('Keyboard', 49.99, 'Mechanical keyboard')
+    with pytest.raises(RuntimeError, match="diverged"):
+        shop.add_to_cart('johndoe', 0, 1)
+    del failing.call
+
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+from complete_code import Order
+from ecommerce_sqlite import SQLiteEcommerceApp
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = SQLiteEcommerceApp(str(tmp_path / 'shop.db'))
+    yield app
+    app.close()
+
+
+def test_register_add_to_cart_and_checkout(app):
+    """
+    General Case: The SQLite engine follows the same flow as EcommerceApp.
+    """
+    assert app.register_user('johndoe', 'Password123!', 'johndoe@example.com') is True
+    assert app.add_product('Laptop', 999.99, 'A high-performance laptop') is True
+    assert app.add_product('Mouse', 19.99, 'Wireless mouse') is True
+    app.add_to_cart('johndoe', 1, 2)
+    app.add_to_cart('johndoe', 0, 1)
+    app.add_to_cart('johndoe', 1, 3)
+    assert [(item['product'].name, item['quantity']) for item in app.view_cart('johndoe')] == [('Mouse', 5), ('Laptop', 1)]
+    order_id = app.checkout('johndoe', '123 Main St', 'paypal')
+    assert order_id == 0
+    order = app.track_order(order_id)
+    assert isinstance(order, Order)
+    assert order.user.username == 'johndoe'
+    assert [(item.product_id, item.quantity) for item in order.items] == [(1, 5), (0, 1)]
+    assert order.total == 1099.94
+    assert app.view_cart('johndoe') == []
+    with pytest.raises(ValueError, match="Cart is empty"):
+        app.checkout('johndoe', '123 Main St', 'paypal')
+
+
+def test_same_errors_as_in_memory_app(app):
+    """
+    Edge Case: Invalid calls raise the same errors as EcommerceApp and leave no partial writes.
+    """
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('JohnDoe', 'Password123!', 'other@example.com')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('janedoe', 'Password123!', 'JOHNDOE@example.com')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('johndoe', 'short', 'johndoe@example.com')  # Duplicate wins over bad password
+    with pytest.raises(ValueError, match="User not registered"):
+        app.add_to_cart('nobody', 0, 1)
+    with pytest.raises(ValueError, match="Invalid product ID"):
+        app.add_to_cart('johndoe', 5, 1)
+    with pytest.raises(ValueError, match="Invalid quantity"):
+        app.add_to_cart('johndoe', 0, 101)
+    app.add_to_cart('johndoe', 0, 1)
+    with pytest.raises(ValueError, match="Invalid payment method"):
+        app.checkout('johndoe', '123 Main St', 'cash')
+    assert len(app.view_cart('johndoe')) == 1  # Failed checkout kept the cart
+    with pytest.raises(ValueError, match="Invalid order ID"):
+        app.track_order(0)
+
+
+def test_status_updates_use_order_rules(app):
+    """
+    General Case: Status changes follow Order.update_status and are queryable by status.
+    """
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(3):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.update_order_status(1, 'Shipped')
+    with pytest.raises(ValueError, match="Cannot change status from Processing to Delivered"):
+        app.update_order_status(2, 'Delivered')
+    assert app.order_ids_by_status('Processing') == [0, 2]
+    assert app.order_ids_by_status('Shipped') == [1]
+    assert app.track_order(1).status == 'Shipped'
+
+
+def test_batch_commits_once_and_isolates_failures(app):
+    """
+    Edge Case: A failing call inside batch() is rolled back on its own; the rest of the batch commits.
+    """
+    with app.batch():
+        app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+        with pytest.raises(ValueError):
+            app.register_user('JOHNDOE', 'Password123!', 'x@example.com')
+        for index in range(50):
+            app.add_product(f'Product {index}', 1.0 + index, '')
+        app.add_to_cart('johndoe', 49, 2)
+    assert app.checkout('johndoe', '123 Main St', 'debit_card') == 0
+    assert app.track_order(0).items[0].unit_price_micros == 50000000
+
+
+def test_concurrent_checkouts_from_worker_threads(app):
+    """
+    Edge Case: Threads sharing the pool place orders without losing or duplicating order IDs.
+    """
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    usernames = [f'user{index}' for index in range(8)]
+    for username in usernames:
+        app.register_user(username, 'Password123!', f'{username}@example.com')
+    order_ids = []
+
+    def shop(username):
+        for _ in range(10):
+            app.add_to_cart(username, 0, 1)
+            order_ids.append(app.checkout(username, '123 Main St', 'credit_card'))
+
+    threads = [threading.Thread(target=shop, args=(username,)) for username in usernames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(order_ids) == list(range(80))
@@ -1,3 +1,10 @@
+import csv
+import io
+import json
+import sys
+import threading
+import time
+
 import pytest
 from complete_code import User, Product, ShoppingCart, Order, EcommerceApp
 
@@ -1244,5 +1251,770 @@ def test_track_order_invalid_order_ids():
     with pytest.raises(ValueError, match="Invalid order ID"):
         app.track_order(999999)  # Excessively large order ID
 
+# Edge Case: Duplicate check ignores surrounding whitespace in the email
+def test_register_user_duplicate_email_with_spaces():
+    """
+    Edge Case: An email that only differs by surrounding whitespace and case is a duplicate.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('janedoe', 'Password123!', '  JOHNDOE@example.com ')
+
+# Edge Case: update_email keeps the uniqueness index in sync
+def test_update_email_reindexes_registered_user():
+    """
+    Edge Case: After a registered user changes email, the old email becomes free and the new one is taken.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.users['johndoe'].update_email('John.New@example.com')
+    assert app.register_user('janedoe', 'Password123!', 'johndoe@example.com')
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('jackdoe', 'Password123!', 'john.new@example.com')
+
+def test_update_email_to_other_users_email():
+    """
+    Edge Case: A registered user cannot take another registered user's email.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.register_user('janedoe', 'Password123!', 'janedoe@example.com')
+    with pytest.raises(ValueError, match="Email already exists"):
+        app.users['janedoe'].update_email('JohnDoe@example.com')
+    assert app.users['janedoe'].email == 'janedoe@example.com'
+
+# Edge Case: Cart lines merge by product ID and keep insertion order
+def test_add_to_cart_keeps_line_order():
+    """
+    Edge Case: Re-adding an earlier product merges into its existing line without reordering the cart.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    app.add_product('Keyboard', 49.99, 'Mechanical keyboard')
+    app.add_to_cart('johndoe', 1, 1)
+    app.add_to_cart('johndoe', 0, 1)
+    app.add_to_cart('johndoe', 2, 1)
+    app.add_to_cart('johndoe', 1, 4)
+    cart = app.carts['johndoe'].view_cart()
+    assert [item['product'].name for item in cart] == ['Mouse', 'Laptop', 'Keyboard']
+    assert [item['quantity'] for item in cart] == [5, 1, 1]
+
+# Edge Case: Catalog hands out Product views backed by compact columns
+def test_add_product_catalog_views():
+    """
+    Edge Case: Products read back from the catalog carry their ID and keep unicode text intact.
+    """
+    app = EcommerceApp()
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Café ☕', 4.5, ' Fresh coffee 😊 ')
+    product = app.products[1]
+    assert isinstance(product, Product)
+    assert product.product_id == 1
+    assert product.name == 'Café ☕'
+    assert product.price == 4.5
+    assert product.description == 'Fresh coffee 😊'
+    assert app.products[-1].name == 'Café ☕'
+    assert [p.name for p in app.products] == ['Laptop', 'Café ☕']
+    assert not hasattr(product, '__dict__')
+
+# General Case: Bulk registration reports each row
+def test_register_users_bulk_report():
+    """
+    General Case: register_users registers valid rows and reports invalid or duplicate rows without stopping.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    reports = app.register_users([
+        ('janedoe', 'Password123!', 'janedoe@example.com'),
+        ('JOHNDOE', 'Password123!', 'other@example.com'),     # Duplicate of an existing user
+        ('jackdoe', 'short', 'jackdoe@example.com'),          # Invalid password
+        {'username': 'JaneDoe2', 'password': 'Password123!', 'email': 'JANEDOE@example.com'},  # Duplicate inside the batch
+        {'username': 'mikedoe', 'password': 'Password123!', 'email': 'mikedoe@example.com'},
+    ])
+    assert [report['registered'] for report in reports] == [True, False, False, False, True]
+    assert reports[1]['error'] == "Username or email already exists"
+    assert reports[2]['error'] == "Invalid password"
+    assert reports[3]['error'] == "Username or email already exists"
+    assert reports[4]['row'] == 4
+    assert set(app.users) == {'johndoe', 'janedoe', 'mikedoe'}
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        app.register_user('MikeDoe', 'Password123!', 'new@example.com')
+
+# General Case: Streaming catalog import from CSV and JSONL
+def test_import_products_csv_with_progress():
+    """
+    General Case: import_products streams a CSV feed in chunks, rejects invalid rows and reports progress.
+    """
+    feed = io.StringIO(
+        'name,price,description\n'
+        'Laptop,999.99,A high-performance laptop\n'
+        ',10.00,Missing name\n'
+        'Mouse,abc,Bad price\n'
+        'Keyboard,49.99,\n'
+        'Monitor,0,Zero price\n'
+    )
+    updates = []
+    app = EcommerceApp()
+    stats = app.import_products(feed, 'csv', chunk_size=2, progress=updates.append)
+    assert stats['rows'] == 5
+    assert stats['imported'] == 2
+    assert stats['rejected'] == 3
+    assert stats['errors'] == {'Invalid product name': 1, 'Invalid product price': 2}
+    assert [update['rows'] for update in updates] == [2, 4, 5]
+    assert [product.name for product in app.products] == ['Laptop', 'Keyboard']
+    assert app.products[1].description == ''
+
+def test_import_products_jsonl():
+    """
+    General Case: import_products reads JSONL feeds and counts malformed lines as rejected.
+    """
+    feed = io.StringIO(
+        '{"name": "Laptop", "price": 999.99, "description": "A high-performance laptop"}\n'
+        '\n'
+        'not json\n'
+        '{"name": "Tablet", "price": "299.99"}\n'
+        '{"name": "Huge", "price": 10000.01, "description": ""}\n'
+    )
+    app = EcommerceApp()
+    stats = app.import_products(feed, 'jsonl')
+    assert (stats['rows'], stats['imported'], stats['rejected']) == (4, 2, 2)
+    assert stats['errors'] == {'Malformed row': 1, 'Invalid product price': 1}
+    assert app.products[1].price == 299.99
+
+def test_import_products_unsupported_format():
+    """
+    Edge Case: Unknown feed formats are rejected up front.
+    """
+    app = EcommerceApp()
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        app.import_products(io.StringIO(''), 'xml')
+
+# General Case: Orders are indexed by status as they move through the workflow
+def test_order_ids_by_status():
+    """
+    General Case: order_ids_by_status follows update_status transitions without scanning all orders.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    order_ids = []
+    for _ in range(3):
+        app.add_to_cart('johndoe', 0, 1)
+        order_ids.append(app.checkout('johndoe', '123 Main St', 'credit_card'))
+    assert app.order_ids_by_status('Processing') == order_ids
+    app.track_order(order_ids[0]).update_status('Shipped')
+    app.track_order(order_ids[2]).update_status('Cancelled')
+    with pytest.raises(ValueError):
+        app.track_order(order_ids[2]).update_status('Shipped')
+    assert app.order_ids_by_status('Processing') == [order_ids[1]]
+    assert app.order_ids_by_status('Shipped') == [order_ids[0]]
+    assert app.order_ids_by_status('Cancelled') == [order_ids[2]]
+    assert app.count_orders_by_status() == {'Processing': 1, 'Shipped': 1, 'Delivered': 0, 'Cancelled': 1}
+    with pytest.raises(ValueError, match="Invalid status"):
+        app.order_ids_by_status('processing')
+
+# General Case: Paginate a user's order history
+def test_orders_for_user_pagination():
+    """
+    General Case: orders_for_user returns only that user's orders, newest first, one page at a time.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.register_user('janedoe', 'Password123!', 'janedoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    john_orders = []
+    for _ in range(5):
+        app.add_to_cart('johndoe', 0, 1)
+        john_orders.append(app.checkout('johndoe', '123 Main St', 'credit_card'))
+        app.add_to_cart('janedoe', 0, 1)
+        app.checkout('janedoe', '456 Elm St', 'paypal')
+
+    seen = []
+    page, cursor = app.orders_for_user('johndoe', limit=2)
+    seen.extend(page)
+    while cursor is not None:
+        page, cursor = app.orders_for_user('johndoe', cursor=cursor, limit=2)
+        seen.extend(page)
+    assert [order.order_id for order in seen] == john_orders[::-1]
+    assert all(order.user.username == 'johndoe' for order in seen)
+
+def test_orders_for_user_without_orders():
+    """
+    Edge Case: A user without orders gets an empty page; unknown users are rejected.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    assert app.orders_for_user('johndoe') == ([], None)
+    with pytest.raises(ValueError, match="User not registered"):
+        app.orders_for_user('nobody')
+
+# Edge Case: Thread-safe mode under contention
+def test_thread_safe_mode_stress():
+    """
+    Edge Case: Concurrent registrations, add_to_cart calls and checkouts in thread-safe mode lose no updates.
+    """
+    app = EcommerceApp(thread_safe=True, lock_stripes=4)
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Force frequent thread switches
+    try:
+        # Everyone races to claim the same username; exactly one wins
+        outcomes = []
+        def claim(index):
+            try:
+                outcomes.append(app.register_user('JohnDoe' if index % 2 else 'johndoe', 'Password123!', f'john{index}@example.com'))
+            except ValueError:
+                outcomes.append(False)
+        threads = [threading.Thread(target=claim, args=(index,)) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert outcomes.count(True) == 1
+        assert len(app.users) == 1
+
+        usernames = [f'user{index}' for index in range(8)]
+        for username in usernames:
+            app.register_user(username, 'Password123!', f'{username}@example.com')
+
+        # Many threads fill the same cart at once
+        def fill(username):
+            for _ in range(200):
+                app.add_to_cart(username, 1, 1)
+        threads = [threading.Thread(target=fill, args=('user0',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert app.carts['user0'].view_cart()[0]['quantity'] == 1600
+
+        # Every user checks out repeatedly in parallel
+        placed = []
+        def shop(username):
+            for _ in range(50):
+                app.add_to_cart(username, 0, 1)
+                placed.append((username, app.checkout(username, '123 Main St', 'credit_card')))
+        threads = [threading.Thread(target=shop, args=(username,)) for username in usernames]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert sorted(order_id for _, order_id in placed) == list(range(len(usernames) * 50))
+    for username, order_id in placed:
+        order = app.track_order(order_id)
+        assert order.order_id == order_id
+        assert order.user.username == username
+    assert len(app.order_ids_by_status('Processing')) == len(usernames) * 50
+
+# General Case: Running cart subtotal frozen onto the order
+def test_cart_subtotal_and_order_total():
+    """
+    General Case: The cart keeps a running subtotal and checkout freezes it onto the order.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    app.add_to_cart('johndoe', 0, 1)
+    app.add_to_cart('johndoe', 1, 2)
+    app.add_to_cart('johndoe', 1, 1)
+    assert app.carts['johndoe'].subtotal == 1059.96
+    order = app.track_order(app.checkout('johndoe', '123 Main St', 'credit_card'))
+    assert order.total == 1059.96
+    assert 'johndoe' not in app.carts
+
+def test_order_total_computed_from_items():
+    """
+    Edge Case: An Order built directly from items computes its own total.
+    """
+    user = User('johndoe', 'Password123!', 'johndoe@example.com')
+    items = [{'product': Product('Tablet', 299.99, 'A versatile tablet'), 'quantity': 3}]
+    assert Order(user, items, '789 Oak St', 'paypal').total == 899.97
+
+# Edge Case: Prices are held as exact integer micro-units
+def test_product_price_micros():
+    """
+    Edge Case: Product keeps an exact integer price next to the float it exposes; bounds apply to the integer.
+    """
+    product = Product('High Precision Product', 1234.567890123, 'A product with a high precision price.')
+    assert product.price_micros == 1234567890
+    assert product.price == 1234.56789
+    assert Product('Whole', 10000, '').price_micros == 10000 * 1000000
+    with pytest.raises(ValueError, match="Invalid product price"):
+        Product('Rounds to zero', 0.0000004, '')
+    with pytest.raises(ValueError, match="Invalid product price"):
+        Product('Not a number', float('nan'), '')
+
+def test_revenue_is_exact_integer_sum():
+    """
+    General Case: Order totals add up exactly in micro-units, where float sums would drift.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Sticker', 0.1, 'A small sticker')
+    for _ in range(10):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    assert sum(order.total for order in app.orders) != 1.0  # Float drift
+    assert app.revenue_micros() == 1000000
+    app.track_order(0).update_status('Cancelled')
+    assert app.revenue_micros('Processing') == 900000
+    assert list(app.products.price_micros_column()) == [100000]
+
+# Edge Case: Checkout snapshots line items into immutable records
+def test_checkout_snapshots_line_items():
+    """
+    Edge Case: Order lines hold product ID, fixed-point unit price and quantity, and cannot be changed.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_to_cart('johndoe', 0, 2)
+    order = app.track_order(app.checkout('johndoe', '123 Main St', 'credit_card'))
+    item = order.items[0]
+    assert (item.product_id, item.unit_price_micros, item.quantity) == (0, 999990000, 2)
+    assert item['quantity'] == 2  # Dict-style access still works
+    assert item.total_micros == order.total_micros
+    with pytest.raises(AttributeError):
+        item.quantity = 5
+    with pytest.raises(TypeError):
+        order.items[0] = item
+    with pytest.raises(KeyError):
+        item['product']
+
+# General Case: Token and prefix search over names and descriptions
+def test_search_products():
+    """
+    General Case: search_products supports AND/OR terms and prefix matching, case-insensitively.
+    """
+    app = EcommerceApp()
+    app.add_product('Gaming Laptop', 1499.99, 'A fast laptop for games')
+    app.add_product('Office Laptop', 799.99, 'Light and quiet')
+    app.add_product('Wireless Mouse', 19.99, 'Ergonomic mouse for the office')
+    app.add_product('Laptop Stand', 29.99, 'Aluminium stand')
+    assert app.search_products('laptop') == [0, 1, 3]
+    assert app.search_products('LAPTOP office') == [1]
+    assert app.search_products('office mouse', mode='or') == [1, 2]
+    assert app.search_products('lap sta', prefix=True) == [3]
+    assert app.search_products('gam', prefix=True) == [0]
+    assert app.search_products('gam') == []
+    assert app.search_products('laptop tablet') == []
+    assert app.search_products('  ') == []
+    with pytest.raises(ValueError, match="Invalid search mode"):
+        app.search_products('laptop', mode='xor')
+
+# General Case: Price range queries and top-N listings
+def test_products_by_price():
+    """
+    General Case: products_by_price pages through a price range in either direction.
+    """
+    app = EcommerceApp()
+    for name, price in [('A', 50.0), ('B', 20.0), ('C', 35.5), ('D', 20.0), ('E', 99.99), ('F', 19.99)]:
+        app.add_product(name, price, '')
+    assert app.products_by_price(20, 50) == [1, 3, 2, 0]
+    assert app.products_by_price(20, 50, limit=2) == [1, 3]
+    assert app.products_by_price(20, 50, offset=2, limit=2) == [2, 0]
+    assert app.products_by_price(20, 50, offset=4) == []
+    assert app.products_by_price(20, 50, descending=True, limit=3) == [0, 2, 3]
+    assert app.products_by_price(20, 50, descending=True, offset=3) == [1]
+    assert app.products_by_price(descending=True, limit=1) == [4]
+    assert app.products_by_price(max_price=19.99) == [5]
+    assert app.products_by_price(60, 70) == []
+    assert list(app.iter_products_by_price(35, descending=True)) == [4, 0, 2]
+    with pytest.raises(ValueError, match="Invalid page"):
+        app.products_by_price(limit=0)
+
+# General Case: Terminal orders move to the on-disk archive
+def test_archive_terminal_orders(tmp_path):
+    """
+    General Case: Delivered and Cancelled orders leave memory but stay trackable and queryable.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(4):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.track_order(0).update_status('Shipped')
+    app.track_order(0).update_status('Delivered')
+    app.track_order(1).update_status('Cancelled')
+    app.track_order(2).update_status('Shipped')
+    with pytest.raises(ValueError, match="No archive attached"):
+        app.archive_orders()
+
+    app.attach_archive(str(tmp_path / 'archive'))
+    assert app.archive_orders() == 2
+    assert app.orders.in_memory_count == 2
+    assert len(app.orders) == 4
+    assert app.archive_orders() == 0
+
+    archived = app.track_order(0)
+    assert archived.status == 'Delivered'
+    assert archived.order_id == 0
+    assert archived.user is app.users['johndoe']
+    assert archived.items[0].unit_price_micros == 999990000
+    with pytest.raises(ValueError, match="Cannot change status from Cancelled to Shipped"):
+        app.track_order(1).update_status('Shipped')
+    with pytest.raises(ValueError, match="Invalid order ID"):
+        app.track_order(4)
+
+    app.track_order(2).update_status('Delivered')
+    assert app.order_ids_by_status('Delivered') == [0, 2]
+    assert app.count_orders_by_status() == {'Processing': 1, 'Shipped': 0, 'Delivered': 2, 'Cancelled': 1}
+    assert [order.order_id for order in app.orders_for_user('johndoe')[0]] == [3, 2, 1, 0]
+    assert app.revenue_micros() == 4 * 999990000
+    assert app.archive_orders() == 1
+    assert app.orders.in_memory_count == 1
+
+# General Case: Status transitions are published as a change stream
+def test_status_event_stream():
+    """
+    General Case: Checkout and status updates publish events that subscribers read incrementally.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    subscription = app.status_events.subscribe()
+    app.add_to_cart('johndoe', 0, 1)
+    order_id = app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.track_order(order_id).update_status('Processing')  # No change, no event
+    app.track_order(order_id).update_status('Shipped')
+    events = subscription.poll()
+    assert [(event.order_id, event.old_status, event.new_status) for event in events] == \
+        [(order_id, None, 'Processing'), (order_id, 'Processing', 'Shipped')]
+    assert subscription.poll() == []
+    app.track_order(order_id).update_status('Delivered')
+    assert [event.new_status for event in subscription.poll()] == ['Delivered']
+    # A second reader can resume from any retained position
+    events, position = app.status_events.read(1, limit=1)
+    assert [event.sequence for event in events] == [1]
+    assert position == 2
+
+def test_status_event_stream_is_bounded():
+    """
+    Edge Case: The ring buffer keeps only the newest events; reading overwritten positions is rejected.
+    """
+    app = EcommerceApp(event_capacity=3)
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(5):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    assert app.status_events.oldest_sequence == 2
+    with pytest.raises(ValueError, match="Sequence no longer available"):
+        app.status_events.read(0)
+    events, position = app.status_events.read(app.status_events.oldest_sequence)
+    assert [event.order_id for event in events] == [2, 3, 4]
+    assert position == app.status_events.next_sequence == 5
+
+def test_carts_are_created_on_first_add():
+    """
+    General Case: Registering a user does not allocate a cart; the first add_to_cart does.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    assert 'johndoe' not in app.carts
+    with pytest.raises(ValueError, match="Cart is empty"):
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.add_to_cart('johndoe', 0, 1)
+    assert len(app.carts) == 1
+    assert app.carts['johndoe'].subtotal == 999.99
+
+def test_idle_carts_spill_and_reload():
+    """
+    General Case: Carts beyond the live limit are spilled least recently used first and reload unchanged.
+    """
+    app = EcommerceApp(max_live_carts=2)
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    for index in range(4):
+        app.register_user(f'user{index}', 'Password123!', f'user{index}@example.com')
+        app.add_to_cart(f'user{index}', 0, 1)
+    app.add_to_cart('user0', 1, 100)
+    app.add_to_cart('user0', 1, 50)  # Merged line above the per-call limit
+    app.add_to_cart('user3', 1, 1)
+    assert app.carts.live_count == 2
+    assert app.carts.spilled_count == 2
+    assert len(app.carts) == 4
+    cart = app.carts['user1']  # Reloaded transparently
+    assert [(item['product'].name, item['quantity']) for item in cart.view_cart()] == [('Laptop', 1)]
+    assert [item['quantity'] for item in app.carts['user0'].view_cart()] == [1, 150]
+    order = app.track_order(app.checkout('user2', '123 Main St', 'credit_card'))
+    assert order.total == 999.99
+
+def test_cart_idle_timeout_and_empty_carts():
+    """
+    Edge Case: Carts idle past the timeout are spilled; empty carts are dropped instead of stored.
+    """
+    app = EcommerceApp(cart_idle_seconds=0.05)
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for username in ('johndoe', 'janedoe', 'bobsmith'):
+        app.register_user(username, 'Password123!', f'{username}@example.com')
+    app.add_to_cart('johndoe', 0, 1)
+    app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.add_to_cart('bobsmith', 0, 1)
+    time.sleep(0.1)
+    app.add_to_cart('janedoe', 0, 2)
+    assert 'johndoe' not in app.carts
+    assert app.carts.spilled_count == 1
+    assert app.carts.live_count == 1
+    assert app.carts['bobsmith'].subtotal == 999.99
+    assert app.carts['janedoe'].subtotal == 1999.98
+    with pytest.raises(ValueError, match="Invalid eviction policy"):
+        EcommerceApp(max_live_carts=0)
+
+def test_update_statuses_applies_legal_transitions():
+    """
+    General Case: A bulk update moves every eligible order and reports illegal transitions per order.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(4):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.track_order(3).update_status('Cancelled')
+    subscription = app.status_events.subscribe()
+    reports = app.update_statuses([0, 1, 3, 7, 1], 'Shipped')
+    assert [(report['order_id'], report['updated'], report['error']) for report in reports] == [
+        (0, True, None),
+        (1, True, None),
+        (3, False, "Cannot change status from Cancelled to Shipped"),
+        (7, False, "Invalid order ID"),
+        (1, False, None),
+    ]
+    assert app.order_ids_by_status('Shipped') == [0, 1]
+    assert app.order_ids_by_status('Processing') == [2]
+    assert [(event.order_id, event.new_status) for event in subscription.poll()] == [(0, 'Shipped'), (1, 'Shipped')]
+
+def test_update_statuses_rejects_unknown_status():
+    """
+    Edge Case: An unknown target status rejects the whole batch before anything changes.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_to_cart('johndoe', 0, 1)
+    order_id = app.checkout('johndoe', '123 Main St', 'credit_card')
+    with pytest.raises(ValueError, match="Invalid status"):
+        app.update_statuses([order_id], 'Lost')
+    assert app.track_order(order_id).status == 'Processing'
+    assert app.update_statuses([], 'Shipped') == []
+
+def _exportable_app():
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_product('Mouse', 19.99, 'Wireless mouse')
+    for index, payment_method in enumerate(['credit_card', 'paypal', 'credit_card', 'debit_card', 'paypal']):
+        app.add_to_cart('johndoe', index % 2, 1)
+        app.add_to_cart('johndoe', 1, 2)
+        app.checkout('johndoe', '123 Main St', payment_method)
+    return app
+
+def test_export_orders_jsonl_with_progress():
+    """
+    General Case: export_orders streams every order as JSONL in chunks and reports throughput after each.
+    """
+    app = _exportable_app()
+    out = io.StringIO()
+    updates = []
+    stats = app.export_orders(out, 'jsonl', chunk_size=2, progress=updates.append)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record['order_id'] for record in records] == [0, 1, 2, 3, 4]
+    assert records[1] == {'order_id': 1, 'username': 'johndoe', 'address': '123 Main St', 'payment_method': 'paypal',
+                          'status': 'Processing', 'total_micros': 59970000,
+                          'items': [[1, 19990000, 3]]}
+    assert stats['orders'] == 5
+    assert [update['orders'] for update in updates] == [2, 4, 5]
+    assert all(update['orders_per_second'] >= 0 for update in updates)
+
+def test_export_orders_csv_filtered_and_archived(tmp_path):
+    """
+    General Case: CSV export has one row per line item, honours filters and includes archived orders in ID order.
+    """
+    app = _exportable_app()
+    app.track_order(0).update_status('Cancelled')
+    app.attach_archive(str(tmp_path))
+    app.archive_orders()
+    app.track_order(2).update_status('Shipped')
+    out = io.StringIO()
+    app.export_orders(out, 'csv', payment_method='credit_card')
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == ['order_id', 'username', 'address', 'payment_method', 'status', 'total_micros',
+                       'product_id', 'unit_price_micros', 'quantity']
+    assert [(row[0], row[4], row[6], row[8]) for row in rows[1:]] == [
+        ('0', 'Cancelled', '0', '1'), ('0', 'Cancelled', '1', '2'),
+        ('2', 'Shipped', '0', '1'), ('2', 'Shipped', '1', '2'),
+    ]
+    out = io.StringIO()
+    assert app.export_orders(out, 'jsonl', status='Cancelled')['orders'] == 1
+    assert [order.order_id for order in app.iter_orders(payment_method='paypal')] == [1, 4]
+
+def test_export_orders_invalid_arguments():
+    """
+    Edge Case: Unknown formats, statuses, payment methods and chunk sizes are rejected before anything is written.
+    """
+    app = _exportable_app()
+    out = io.StringIO()
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        app.export_orders(out, 'xml')
+    with pytest.raises(ValueError, match="Invalid status"):
+        app.export_orders(out, status='Lost')
+    with pytest.raises(ValueError, match="Invalid payment method"):
+        app.export_orders(out, payment_method='cash')
+    with pytest.raises(ValueError, match="Invalid chunk size"):
+        app.export_orders(out, chunk_size=0)
+    assert out.getvalue() == ''
+    assert EcommerceApp().export_orders(out, 'csv')['orders'] == 0
+
+def test_price_index_merges_new_products_between_queries():
+    """
+    Edge Case: Products added after a query are merged into price order (ties by ID) by the next query.
+    """
+    app = EcommerceApp()
+    for name, price in [('A', 5.0), ('B', 1.0), ('C', 3.0)]:
+        app.add_product(name, price, '')
+    assert app.products_by_price() == [1, 2, 0]
+    for name, price in [('D', 3.0), ('E', 0.5), ('F', 9.0)]:
+        app.add_product(name, price, '')
+    assert app.products_by_price() == [4, 1, 2, 3, 0, 5]
+    assert list(app.iter_products_by_price(3, 5, descending=True)) == [0, 3, 2]
+
+def test_prefix_search_sees_tokens_added_after_a_query():
+    """
+    Edge Case: Tokens from products added after a prefix search are found by the next prefix search.
+    """
+    app = EcommerceApp()
+    app.add_product('Laptop SKU100', 999.99, 'A high-performance laptop')
+    assert app.search_products('sku', prefix=True) == [0]
+    app.add_product('Mouse SKU050', 19.99, 'Wireless mouse')
+    app.add_product('Lapdesk SKU200', 29.99, 'Desk for a laptop')
+    assert app.search_products('sku', prefix=True) == [0, 1, 2]
+    assert app.search_products('lap', prefix=True) == [0, 2]
+
+def test_register_users_reports_malformed_rows():
+    """
+    Edge Case: Rows that are not (username, password, email) are reported per row and do not abort the batch.
+    """
+    app = EcommerceApp()
+    reports = app.register_users([
+        ('a', 'b'),
+        None,
+        ('johndoe', 'Password123!', 'johndoe@example.com', 'extra'),
+        ('janedoe', 'Password123!', 'janedoe@example.com'),
+    ])
+    assert [(report['registered'], report['error']) for report in reports] == [
+        (False, "Invalid user data"),
+        (False, "Invalid user data"),
+        (False, "Invalid user data"),
+        (True, None),
+    ]
+    assert reports[0]['username'] is None
+    assert list(app.users) == ['janedoe']
+
+def test_checkout_total_matches_items_after_line_edit():
+    """
+    Edge Case: Editing a line returned by view_cart() cannot make the order total disagree with its items.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    app.add_to_cart('johndoe', 0, 1)
+    app.carts['johndoe'].view_cart()[0]['quantity'] = 50
+    order = app.track_order(app.checkout('johndoe', '123 Main St', 'credit_card'))
+    assert order.items[0].quantity == 50
+    assert order.total_micros == sum(item.total_micros for item in order.items)
+
+def test_single_and_bulk_status_updates_do_not_race():
+    """
+    Edge Case: Concurrent single and bulk updates never move an order out of a terminal status.
+    """
+    app = EcommerceApp(thread_safe=True)
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(200):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    order_ids = list(range(200))
+
+    def cancel_each():
+        for order_id in order_ids:
+            try:
+                app.track_order(order_id).update_status('Cancelled')
+            except ValueError:
+                pass
+
+    worker = threading.Thread(target=cancel_each)
+    worker.start()
+    app.update_statuses(order_ids, 'Shipped')
+    worker.join()
+    events = app.status_events.read(app.status_events.oldest_sequence, limit=10000)[0]
+    assert not [event for event in events if event.old_status == 'Cancelled']
+    for status in ('Shipped', 'Cancelled'):
+        assert all(app.track_order(order_id).status == status for order_id in app.order_ids_by_status(status))
+
+def test_register_users_rejected_row_does_not_block_later_rows():
+    """
+    Edge Case: A row rejected as a duplicate of an existing user does not reserve its email for later rows.
+    """
+    app = EcommerceApp()
+    app.register_user('alice', 'Password123!', 'alice@example.com')
+    reports = app.register_users([
+        ('alice', 'Password123!', 'fresh@example.com'),
+        ('bobsmith', 'Password123!', 'fresh@example.com'),
+        ('carol', 'Password123!', 'FRESH@example.com'),
+    ])
+    assert [(report['registered'], report['error']) for report in reports] == [
+        (False, "Username or email already exists"),
+        (True, None),
+        (False, "Username or email already exists"),
+    ]
+
+def test_cart_merges_catalog_products_by_id():
+    """
+    Edge Case: Adding the same catalog product twice through separate lookups merges into one line.
+    """
+    app = EcommerceApp()
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    cart = ShoppingCart()
+    cart.add_to_cart(app.products[0], 1)
+    cart.add_to_cart(app.products[0], 2)
+    assert [item['quantity'] for item in cart.view_cart()] == [3]
+    loose = Product('Pen', 1.5, '')
+    cart.add_to_cart(loose, 1)
+    cart.add_to_cart(Product('Pen', 1.5, ''), 1)
+    assert len(cart.view_cart()) == 3
+
+def test_order_book_iteration_and_negative_indices(tmp_path):
+    """
+    Edge Case: Iterating the order book streams archived orders in ID order, and negative indices count from the end.
+    """
+    app = EcommerceApp()
+    app.register_user('johndoe', 'Password123!', 'johndoe@example.com')
+    app.add_product('Laptop', 999.99, 'A high-performance laptop')
+    for _ in range(4):
+        app.add_to_cart('johndoe', 0, 1)
+        app.checkout('johndoe', '123 Main St', 'credit_card')
+    app.track_order(0).update_status('Cancelled')
+    app.track_order(2).update_status('Cancelled')
+    app.attach_archive(str(tmp_path))
+    app.archive_orders()
+    assert [order.order_id for order in app.orders] == [0, 1, 2, 3]
+    assert [order.status for order in app.orders] == ['Cancelled', 'Processing', 'Cancelled', 'Processing']
+    assert app.revenue_micros() == 4 * 999990000
+    assert app.orders[-1].order_id == 3
+    assert app.orders[-2].order_id == 2
+    with pytest.raises(IndexError):
+        app.orders[-5]
+
 
 pytest.main()